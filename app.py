@@ -4,12 +4,24 @@ import pathlib
 from streamlit_gsheets import GSheetsConnection
 import pandas as pd
 from helper.gsheet_connection import GsheetConnection  
+from helper.sheet_cache import get_snapshot
+from helper.sheet_sync import get_mirror
+from helper.asset_store import get_store
+from helper.audit_log import start_mirror
+from helper.sheet_writer import get_writer
 
 # Configuration
 TOKEN_JSON = dict(st.secrets["gsheet_auth"]["sheet_token_json"])
 SCOPES = st.secrets["gsheet_auth"]["SCOPES"]
 SPREADSHEET_ID = st.secrets["gsheet_auth"]["SPREADSHEET_ID"]
 SHEET_NAME = st.secrets["gsheet_auth"]["SHEET_NAME"]
+# How long (seconds) the shared sheet snapshot is reused before reloading
+CACHE_TTL = int(st.secrets["gsheet_auth"].get("CACHE_TTL", 600))
+# "incremental" only re-downloads when the sheet changed and re-parses edited rows,
+# "full" reloads and re-parses the whole sheet every time the snapshot expires
+SYNC_MODE = st.secrets["gsheet_auth"].get("SYNC_MODE", "incremental")
+# Sheet the audit log of asset changes is copied to
+HISTORY_SHEET_NAME = st.secrets["gsheet_auth"].get("HISTORY_SHEET_NAME", "HISTORY")
 
 st.set_page_config(initial_sidebar_state="expanded", layout="wide", page_icon="🎬", page_title="Knowledge Management Database")
 
@@ -53,10 +65,47 @@ st.markdown(
 #     worksheet="STREAMLIT DATA",
 #     ttl="10m",
 # )
-gsheet = GsheetConnection(TOKEN_JSON, SCOPES, SPREADSHEET_ID, SHEET_NAME)
-df = gsheet.get_data()
+store = get_store()
+start_mirror(TOKEN_JSON, SCOPES, SPREADSHEET_ID, HISTORY_SHEET_NAME)
+
+def load_sheet():
+    gsheet = GsheetConnection(TOKEN_JSON, SCOPES, SPREADSHEET_ID, SHEET_NAME)
+    if SYNC_MODE == "full":
+        data, changed_rows = gsheet.fetch_data(), None
+    else:
+        data, changed_rows = get_mirror(SPREADSHEET_ID, SHEET_NAME).sync(gsheet)
+    if changed_rows != []:
+        # Keep the local store in step with the sheet
+        store.save(data)
+    return data, changed_rows
+
+# One parsed copy of the sheet is shared by every session. It is refreshed in
+# the background once CACHE_TTL expires, reloaded right away after a page
+# invalidates it, and seeded from the local store when the server starts
+snapshot = get_snapshot(SPREADSHEET_ID, SHEET_NAME, loader=load_sheet, ttl=CACHE_TTL, seed=store.load)
+df = snapshot.data
 
 st.session_state['data'] = df
+st.session_state['snapshot'] = snapshot
+
+# Writes waiting in the local queue (also resumes any left over from a previous run)
+writer = get_writer(TOKEN_JSON, SCOPES, SPREADSHEET_ID, SHEET_NAME)
+write_status = writer.status()
+if write_status["pending"] or write_status["failed"]:
+    note = " (Google Sheets tidak tersedia, dicoba lagi otomatis)" if write_status["paused"] else ""
+    st.sidebar.caption(f"🕒 {write_status['pending']} perubahan menunggu · ❌ {write_status['failed']} gagal{note}")
+    if write_status["failed"]:
+        with st.sidebar.expander("Perubahan Gagal"):
+            failed = [(op_id, kind, str(payload), error) for op_id, kind, payload, error in writer.failed()]
+            st.dataframe(pd.DataFrame(failed, columns=["ID", "Jenis", "Data", "Error"]), hide_index=True)
+            col1, col2 = st.columns(2)
+            if col1.button("🔁 Kirim Ulang"):
+                writer.retry_failed()
+                writer.flush()
+                st.rerun()
+            if col2.button("🗑️ Buang"):
+                writer.discard_failed()
+                st.rerun()
 
 nav = get_nav_from_toml(".streamlit/pages.toml")
 
@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from helper.asset_table import positions_digest
+from helper.filter_engine import FilterEngine
+
+# Dimensions the sidebar filters on; every combination becomes one cube cell
+CUBE_DIMENSIONS = ["PENEMPATAN ASET", "Sumber", "Kelompok Aset", "Kepemilikan", "Tahun Beli", "Bulan Beli"]
+# Slices (with their figures) remembered per snapshot
+SLICE_MEMO_SIZE = 32
+
+
+class CubeSlice:
+    """Dashboard aggregates for one filter state, with its figures memoized."""
+
+    def __init__(self, cells):
+        self.qty = float(cells["Qty"].sum())
+        self.count = int(cells["Jumlah"].sum())
+        self.price = float(cells["Harga Perolehan"].sum())
+
+        ownership = cells.groupby("Kepemilikan", observed=True)["Jumlah"].sum()
+        ownership = ownership[ownership > 0].sort_values(ascending=False)
+        self.ownership = pd.DataFrame({
+            "Kepemilikan": ownership.index.astype(str),
+            "Percentage": (ownership.to_numpy() * 100 / max(ownership.sum(), 1)).round(2),
+        })
+        self.timeline = (cells.groupby("Tahun Beli")[["Qty", "Harga Perolehan"]].sum()
+                         .reset_index().sort_values("Tahun Beli"))
+
+        self._figures = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Aggregate raw rows directly, for filters the cube cannot answer."""
+        cells = pd.DataFrame({
+            "Kepemilikan": rows["Kepemilikan"],
+            "Tahun Beli": rows["Tahun Beli"],
+            "Qty": rows["Qty"],
+            "Jumlah": 1,
+            "Harga Perolehan": rows["Harga Perolehan"],
+        })
+        return cls(cells)
+
+    def figure(self, name, builder):
+        """Return builder(self), building each figure only once per slice."""
+        with self._lock:
+            if name not in self._figures:
+                self._figures[name] = builder(self)
+            return self._figures[name]
+
+
+class AggregateCube:
+    """Qty, asset count and acquisition price pre-aggregated over CUBE_DIMENSIONS.
+
+    A filter on those dimensions selects cube cells instead of asset rows,
+    so the dashboard metrics and charts cost the same whatever the size of
+    the inventory. Cells are filtered with the same engine as the table.
+    """
+
+    def __init__(self, data):
+        dimensions = [column for column in CUBE_DIMENSIONS if column in data.columns]
+        measures = data[dimensions].copy()
+        measures["Qty"] = pd.to_numeric(data["Qty"], errors="coerce").fillna(0)
+        measures["Jumlah"] = 1
+        measures["Harga Perolehan"] = pd.to_numeric(data["Harga Perolehan"], errors="coerce").fillna(0)
+
+        self.cells = (measures.groupby(dimensions, observed=True, dropna=False)
+                      .agg({"Qty": "sum", "Jumlah": "sum", "Harga Perolehan": "sum"})
+                      .reset_index())
+        self._engine = FilterEngine(self.cells)
+        self._slices = OrderedDict()
+        self._lock = threading.Lock()
+
+    def rollup(self, categories, year_range):
+        """Aggregates for a category selection and Tahun Beli range."""
+        cell_positions = self._engine.positions(categories, {"Tahun Beli": year_range})
+        key = positions_digest(cell_positions)
+
+        with self._lock:
+            if key in self._slices:
+                self._slices.move_to_end(key)
+                return self._slices[key]
+
+        cube_slice = CubeSlice(self.cells.iloc[cell_positions])
+        with self._lock:
+            self._slices[key] = cube_slice
+            while len(self._slices) > SLICE_MEMO_SIZE:
+                self._slices.popitem(last=False)
+        return cube_slice
+
+
+def get_aggregate_cube(snapshot):
+    """Return the shared cube of a snapshot, building it on first use."""
+    return snapshot.derived("aggregate_cube", lambda s: AggregateCube(s.data))
@@ -0,0 +1,161 @@
+import csv
+import io
+import re
+
+from openpyxl import load_workbook
+
+from helper.asset_index import normalize_asset_no
+from helper.asset_schema import (
+    SUMBER_OPTIONS, KELOMPOK_OPTIONS, KEPEMILIKAN_OPTIONS, BULAN_OPTIONS,
+    PERSENTASE_PENYUSUTAN_OPTIONS, STATUS_OPTIONS, NON_NUMERIC, RUPIAH_PREFIX, DOT_THOUSANDS, new_asset_row,
+)
+
+# Rows validated and queued per step; only one chunk is held in memory at a time
+CHUNK_SIZE = 1000
+
+# Columns accepted in an import file, in template order
+IMPORT_COLUMNS = [
+    "Nomor Asset", "PENEMPATAN ASET", "Sumber", "Nama Asset", "Kelompok Aset", "Kepemilikan",
+    "Qty", "Dokumentasi", "Invoice", "Harga Perolehan", "Tahun Beli", "Bulan Beli",
+    "Umur Ekonomis", "Persentase Penyusutan", "Status",
+]
+
+# Same defaults as the add item form
+DEFAULTS = {
+    "Qty": "1",
+    "Umur Ekonomis": "4",
+    "Persentase Penyusutan": "25",
+    "Status": "Available",
+}
+
+CHOICES = {
+    "Sumber": SUMBER_OPTIONS,
+    "Kelompok Aset": KELOMPOK_OPTIONS,
+    "Kepemilikan": KEPEMILIKAN_OPTIONS,
+    "Bulan Beli": BULAN_OPTIONS,
+    "Status": STATUS_OPTIONS,
+}
+
+# (min, max, whole number) for numeric fields, matching the form's inputs
+NUMBER_RULES = {
+    "Qty": (1, None, True),
+    "Harga Perolehan": (0, None, False),
+    "Tahun Beli": (2000, 2100, True),
+    "Umur Ekonomis": (1, 50, True),
+    "Persentase Penyusutan": (0, 100, False),
+}
+
+
+def template_csv():
+    """Empty import template with the expected header."""
+    return (",".join(IMPORT_COLUMNS) + "\n").encode()
+
+
+def _header_map(header):
+    # Match columns case-insensitively and ignore surrounding spaces
+    wanted = {column.lower(): column for column in IMPORT_COLUMNS}
+    return [wanted.get(str(name or "").strip().lower()) for name in header]
+
+
+def _chunked(rows, header, chunk_size):
+    columns = _header_map(header)
+    chunk = []
+    # Row 1 is the header, so data starts on row 2 like in a spreadsheet
+    for row_number, row in enumerate(rows, start=2):
+        record = {}
+        for column, value in zip(columns, row):
+            if column is not None:
+                record[column] = "" if value is None else str(value).strip()
+        if not any(record.values()):
+            continue  # skip blank lines
+        chunk.append((row_number, record))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_chunks(uploaded_file, chunk_size=CHUNK_SIZE):
+    """Yield lists of (row_number, record) from a CSV or XLSX upload, chunk by chunk."""
+    if uploaded_file.name.lower().endswith((".xlsx", ".xlsm")):
+        workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            yield from _chunked(rows, header, chunk_size)
+        finally:
+            workbook.close()
+    else:
+        text = io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+        rows = csv.reader(text)
+        header = next(rows, None)
+        if header is None:
+            return
+        yield from _chunked(rows, header, chunk_size)
+
+
+def _parse_number(text):
+    cleaned = re.sub(NON_NUMERIC, "", text)
+    if cleaned.count(".") > 1 or (re.match(RUPIAH_PREFIX, text) and re.match(DOT_THOUSANDS, cleaned)):
+        cleaned = cleaned.replace(".", "")  # dot thousands, e.g. 1.500.000 or Rp 1.500
+    return float(cleaned)
+
+
+def validate_record(record, asset_index, seen):
+    """Check one import row.
+
+    Returns (sheet_row, errors): sheet_row is the row to append when the
+    record is valid, otherwise None and errors lists what is wrong. seen
+    collects the asset numbers accepted so far so duplicates inside the file
+    are caught too.
+    """
+    errors = []
+    values = {column: record.get(column, "") or DEFAULTS.get(column, "") for column in IMPORT_COLUMNS}
+
+    nomor_asset = values["Nomor Asset"]
+    key = normalize_asset_no(nomor_asset)
+    if not key:
+        errors.append("Nomor Asset Wajib Terisi")
+    elif key in asset_index:
+        errors.append("Nomor Asset sudah ada di database")
+    elif key in seen:
+        errors.append("Nomor Asset duplikat di dalam file")
+
+    for column in ("Nama Asset", "Bulan Beli"):
+        if not values[column]:
+            errors.append(f"{column} Wajib Terisi")
+
+    for column, options in CHOICES.items():
+        if values[column] and values[column] not in options:
+            errors.append(f"{column} harus salah satu dari: {', '.join(options)}")
+
+    for column, (low, high, whole) in NUMBER_RULES.items():
+        text = values[column]
+        if not text:
+            errors.append(f"{column} Wajib Terisi")
+            continue
+        try:
+            number = _parse_number(text)
+        except ValueError:
+            errors.append(f"{column} bukan angka: {text}")
+            continue
+        if (low is not None and number < low) or (high is not None and number > high):
+            errors.append(f"{column} di luar rentang: {text}")
+            continue
+        if whole and not number.is_integer():
+            errors.append(f"{column} harus bilangan bulat: {text}")
+            continue
+        values[column] = int(number) if whole else number
+
+    rate = values["Persentase Penyusutan"]
+    if isinstance(rate, float) and rate not in PERSENTASE_PENYUSUTAN_OPTIONS:
+        errors.append(f"Persentase Penyusutan harus salah satu dari: {PERSENTASE_PENYUSUTAN_OPTIONS}")
+
+    if errors:
+        return None, errors
+
+    seen.add(key)
+    return new_asset_row(values), []
@@ -0,0 +1,44 @@
+def normalize_asset_no(value):
+    """Canonical form of a Nomor Asset used for lookups (trimmed, upper case)."""
+    return str(value).strip().upper()
+
+
+class AssetIndex:
+    """Hash index from normalized Nomor Asset to its row in a snapshot."""
+
+    def __init__(self, data):
+        self.data = data
+        self._positions = {}
+        if "Nomor Asset" not in data.columns:
+            return
+
+        keys = data["Nomor Asset"].astype(str).str.strip().str.upper().tolist()
+        # Walk backwards so the first row wins for duplicated numbers, like .iloc[0]
+        for position in range(len(keys) - 1, -1, -1):
+            if keys[position]:
+                self._positions[keys[position]] = position
+
+    def __contains__(self, asset_no):
+        return normalize_asset_no(asset_no) in self._positions
+
+    def __len__(self):
+        return len(self._positions)
+
+    def position(self, asset_no):
+        """Row position of the asset in the snapshot DataFrame, or None."""
+        return self._positions.get(normalize_asset_no(asset_no))
+
+    def sheet_row(self, asset_no):
+        """1-based row number of the asset in the sheet (row 1 is the header), or None."""
+        position = self.position(asset_no)
+        return None if position is None else position + 2
+
+    def record(self, asset_no):
+        """The asset's row as a dict, or None if the number is unknown."""
+        position = self.position(asset_no)
+        return None if position is None else self.data.iloc[position].to_dict()
+
+
+def get_asset_index(snapshot):
+    """Return the shared AssetIndex of a snapshot, building it on first use."""
+    return snapshot.derived("asset_index", lambda s: AssetIndex(s.data))
@@ -0,0 +1,175 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Column order of the asset sheet (A:X)
+COLUMNS = [
+    "Nomor Asset", "PENEMPATAN ASET", "Sumber", "Nama Asset", "Kelompok Aset", "Kepemilikan",
+    "Qty", "Dokumentasi", "Invoice", "Harga Perolehan", "Tahun Beli", "Bulan Beli",
+    "Umur Ekonomis", "Nilai Penyusutan per Bulan",
+    "VALUASI ASSET 2019", "VALUASI ASSET 2020", "VALUASI ASSET 2021", "VALUASI ASSET 2022",
+    "VALUASI ASSET 2023", "VALUASI ASSET 2024", "VALUASI ASSET 2025",
+    "Nilai Buku 2024", "Status", "Label",
+]
+
+# Choices offered when a new asset is entered
+SUMBER_OPTIONS = ["Invoice Fauzie", "CC Rhaya", "Invoice Futih"]
+KELOMPOK_OPTIONS = ["Kelompok I", "Kelompok II"]
+KEPEMILIKAN_OPTIONS = ["RMU", "LDR", "RFI", "FUTIH"]
+BULAN_OPTIONS = [
+    "Januari", "Februari", "Maret", "April", "Mei", "Juni",
+    "Juli", "Agustus", "September", "Oktober", "November", "Desember",
+]
+PERSENTASE_PENYUSUTAN_OPTIONS = [25, 12.5]
+STATUS_OPTIONS = ["Available", "Missing", "Unlabeled", "Others"]
+
+# How each column is stored: "text", "category" (few distinct values) or "number".
+# Columns not listed here are kept as text.
+SCHEMA = {
+    "Nomor Asset": "text",
+    "PENEMPATAN ASET": "category",
+    "Sumber": "category",
+    "Nama Asset": "text",
+    "Kelompok Aset": "category",
+    "Kepemilikan": "category",
+    "Qty": "number",
+    "Dokumentasi": "text",
+    "Invoice": "text",
+    "Harga Perolehan": "number",
+    "Tahun Beli": "number",
+    "Bulan Beli": "category",
+    "Umur Ekonomis": "number",
+    "Nilai Penyusutan per Bulan": "number",
+    "Status": "category",
+    "Label": "text",
+}
+
+# Yearly valuation columns are matched by name, so a new year needs no code change
+NUMBER_PATTERNS = [
+    re.compile(r"^VALUASI ASSET \d{4}$"),
+    re.compile(r"^Nilai Buku \d{4}$"),
+]
+
+TEXT_DTYPE = "string[pyarrow]"
+
+# Rupiah amounts are written as "Rp 1,500,000" (comma thousands, dot decimals);
+# anything that is not a digit, dot or minus sign is dropped before parsing
+NON_NUMERIC = r"[^\d.\-]"
+VALID_NUMBER = r"^-?(\d+\.?\d*|\.\d+)$"
+# With an Rp prefix a single dot before exactly three digits is a thousands separator:
+# "Rp 1.500" is 1500, not 1.5
+RUPIAH_PREFIX = r"^\s*-?\s*[Rr][Pp]"
+DOT_THOUSANDS = r"^-?\d{1,3}\.\d{3}$"
+
+
+def column_letter(column):
+    """Sheet column letter of an asset column: 'Status' -> 'W'."""
+    number = COLUMNS.index(column) + 1
+    letters = ""
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def cell_text(value):
+    """One text form per cell value, so 1000, 1000.0 and "1000" compare equal; None if empty."""
+    if value is None or value is pd.NA or value != value:
+        return None
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"  # as the sheet shows checkboxes
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    # The sheet uses "-" for an empty cell
+    return None if text in ("", "-") else text
+
+
+def column_kind(name):
+    """Return "text", "category" or "number" for a sheet column."""
+    if name in SCHEMA:
+        return SCHEMA[name]
+    if any(pattern.match(name) for pattern in NUMBER_PATTERNS):
+        return "number"
+    return "text"
+
+
+def new_asset_row(record):
+    """Sheet row (COLUMNS order) for a new asset.
+
+    record holds the form fields plus "Persentase Penyusutan" (yearly %),
+    from which the monthly depreciation is derived. Valuation and book value
+    columns are left as "-" for accounting to fill in.
+    """
+    values = dict(record)
+    values["Nilai Penyusutan per Bulan"] = (
+        values["Harga Perolehan"] * values.pop("Persentase Penyusutan") / 100
+    ) / 12
+    values["Label"] = True
+    return [values.get(column, "-") for column in COLUMNS]
+
+
+def valuation_columns(columns):
+    """Return the yearly VALUASI ASSET columns present, oldest first."""
+    return sorted(c for c in columns if NUMBER_PATTERNS[0].match(c))
+
+
+def parse_numbers(values):
+    """Parse a flat array of sheet strings to float64; blanks and "-" become 0."""
+    raw = pa.array(values, type=pa.string())
+    text = pc.replace_substring_regex(raw, NON_NUMERIC, "")
+    # Dot thousands ("1.500.000") show up as more than one dot, or as one after an Rp prefix
+    rupiah = pc.fill_null(pc.match_substring_regex(raw, RUPIAH_PREFIX), False)
+    dotted = pc.or_(pc.greater(pc.count_substring(text, "."), 1),
+                    pc.and_(rupiah, pc.match_substring_regex(text, DOT_THOUSANDS)))
+    text = pc.if_else(dotted, pc.replace_substring(text, ".", ""), text)
+    text = pc.if_else(pc.match_substring_regex(text, VALID_NUMBER), text, None)
+    return pc.cast(text, pa.float64()).fill_null(0).to_numpy(zero_copy_only=False)
+
+
+def build_frame(header, rows):
+    """Build the asset DataFrame from raw sheet rows in one pass.
+
+    Every numeric cell is cleaned and parsed in a single vectorized call,
+    text columns are stored as Arrow strings and low-cardinality columns as
+    categoricals, with blanks kept as "" so rows stay JSON-serializable.
+    """
+    width = len(header)
+    grid = np.empty((len(rows), width), dtype=object)
+    for i, row in enumerate(rows):
+        # The API trims trailing empty cells, so pad every row to the header width
+        grid[i] = row[:width] + [""] * (width - len(row))
+
+    kinds = [column_kind(name) for name in header]
+    arrays = [None] * width
+
+    numeric = [i for i, kind in enumerate(kinds) if kind == "number"]
+    if numeric:
+        # Column-major so each parsed column is a contiguous slice
+        parsed = parse_numbers(grid[:, numeric].T.ravel()).reshape(len(numeric), len(rows))
+        for j, i in enumerate(numeric):
+            arrays[i] = parsed[j]
+
+    for i, kind in enumerate(kinds):
+        if kind == "text":
+            arrays[i] = pd.array(grid[:, i], dtype=TEXT_DTYPE)
+        elif kind == "category":
+            arrays[i] = pd.Series(grid[:, i], dtype=TEXT_DTYPE).astype("category")
+
+    df = pd.DataFrame({i: array for i, array in enumerate(arrays)})
+    # Assigned afterwards so duplicate or blank header names survive
+    df.columns = header
+    return df
+
+
+def concat_frames(frames):
+    """Concatenate frames from build_frame, keeping categorical columns categorical."""
+    df = pd.concat(frames, ignore_index=True)
+    for i, name in enumerate(df.columns):
+        # pandas falls back to strings when the blocks' categories differ
+        if column_kind(name) == "category" and not isinstance(df.dtypes.iloc[i], pd.CategoricalDtype):
+            df.isetitem(i, df.iloc[:, i].astype("category"))
+    return df
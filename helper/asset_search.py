@@ -0,0 +1,204 @@
+import bisect
+import re
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+# Searchable columns and how much a match in each counts
+SEARCH_FIELDS = {"Nama Asset": 1.0, "Nomor Asset": 1.0, "PENEMPATAN ASET": 0.5, "Sumber": 0.5}
+# Trigram similarity a misspelled word needs to still match
+FUZZY_THRESHOLD = 0.4
+SEARCH_LIMIT = 500
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lower-case words and numbers of a text: 'INV.RHF.025' -> ['inv', 'rhf', '025']."""
+    return _TOKEN.findall(str(text).lower())
+
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AssetSearch:
+    """Inverted index over the searchable columns of a snapshot.
+
+    Each word maps to the rows containing it, and each trigram to the words
+    containing it, so a query word is matched exactly, as a prefix (search
+    as you type) or fuzzily (typos, worn labels) without scanning the rows.
+    Every word of the query must match; rows are ranked by match quality.
+
+    Given the index of the previous snapshot, only changed_rows are
+    re-indexed. The previous index is left as it was (other sessions may
+    still search it): its tables are copied shallowly, and the rows of a
+    word or the words of a trigram are copied the first time they change.
+    """
+
+    def __init__(self, data, previous=None, changed_rows=None):
+        self._lock = threading.Lock()
+        self._own_words = set()
+        self._own_trigrams = set()
+        if previous is None:
+            self._postings = defaultdict(dict)   # word -> {row position: field weight}
+            self._trigrams = defaultdict(set)    # trigram -> words
+            self._vocabulary = []                # every word, sorted, for prefix lookups
+            self._row_words = []                 # row position -> {word: field weight}
+            self.size = 0
+            changed_rows = range(len(data))
+        else:
+            with previous._lock:
+                self._postings = defaultdict(dict, previous._postings)
+                self._trigrams = defaultdict(set, previous._trigrams)
+                self._vocabulary = previous._vocabulary
+                self._row_words = list(previous._row_words)
+                self.size = previous.size
+        self.update(data, changed_rows)
+
+    def _rows_of(self, word):
+        # Copied before the first change, as the previous index may share it
+        if word not in self._own_words:
+            self._postings[word] = dict(self._postings.get(word, ()))
+            self._own_words.add(word)
+        return self._postings[word]
+
+    def _words_of(self, trigram):
+        if trigram not in self._own_trigrams:
+            self._trigrams[trigram] = set(self._trigrams.get(trigram, ()))
+            self._own_trigrams.add(trigram)
+        return self._trigrams[trigram]
+
+    def _words(self, record):
+        words = {}
+        for field, weight in SEARCH_FIELDS.items():
+            value = record.get(field)
+            if value is None or value != value:
+                continue
+            for token in tokenize(value):
+                words[token] = max(weight, words.get(token, 0))
+        return words
+
+    def _remove_row(self, position):
+        for word in self._row_words[position]:
+            rows = self._rows_of(word)
+            rows.pop(position, None)
+            if not rows:
+                del self._postings[word]
+                self._own_words.discard(word)
+                for trigram in trigrams(word):
+                    self._words_of(trigram).discard(word)
+
+    def _add_row(self, position, words):
+        self._row_words[position] = words
+        for word, weight in words.items():
+            if word not in self._postings:
+                for trigram in trigrams(word):
+                    self._words_of(trigram).add(word)
+            self._rows_of(word)[position] = weight
+
+    def update(self, data, changed_rows):
+        """Re-index the given row positions of data, which may have grown or shrunk.
+
+        Only called while the index is being built, before anyone searches it.
+        """
+        columns = [field for field in SEARCH_FIELDS if field in data.columns]
+        with self._lock:
+            for position in range(len(data), self.size):
+                self._remove_row(position)
+            del self._row_words[len(data):]
+            self._row_words.extend({} for _ in range(len(data) - len(self._row_words)))
+            self.size = len(data)
+
+            changed = sorted(position for position in set(changed_rows) if position < len(data))
+            records = data[columns].iloc[changed].to_dict("records")
+            for position, record in zip(changed, records):
+                self._remove_row(position)
+                self._add_row(position, self._words(record))
+            self._vocabulary = sorted(self._postings)
+
+    def _match_words(self, term):
+        # Words the term starts, from the sorted vocabulary
+        matches = {}
+        index = bisect.bisect_left(self._vocabulary, term)
+        while index < len(self._vocabulary) and self._vocabulary[index].startswith(term):
+            word = self._vocabulary[index]
+            matches[word] = 1.0 if word == term else 0.8
+            index += 1
+
+        # Misspelled words share most trigrams; numbers are only matched exactly or by prefix
+        if len(term) < 3 or any(char.isdigit() for char in term):
+            return matches
+        term_trigrams = trigrams(term)
+        overlap = defaultdict(int)
+        for trigram in term_trigrams:
+            for word in self._trigrams.get(trigram, ()):
+                overlap[word] += 1
+        for word, shared in overlap.items():
+            similarity = shared / (len(term_trigrams) + len(word) + 1 - shared)
+            if word not in matches and similarity >= FUZZY_THRESHOLD:
+                matches[word] = 0.6 * similarity
+        return matches
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """Row positions matching every word of the query, best match first."""
+        terms = tokenize(query)
+        if not terms:
+            return np.array([], dtype=int)
+
+        with self._lock:
+            term_matches = [self._match_words(term) for term in dict.fromkeys(terms)]
+            # Rarest term first, so later terms only score rows still in the running
+            term_matches.sort(key=lambda matches: sum(len(self._postings[word]) for word in matches))
+
+            scores = None
+            for matches in term_matches:
+                term_scores = {}
+                for word, quality in matches.items():
+                    rows = self._postings[word]
+                    if scores is not None and len(scores) < len(rows):
+                        rows = {position: rows[position] for position in scores if position in rows}
+                    for position, weight in rows.items():
+                        score = quality * weight
+                        if score > term_scores.get(position, 0):
+                            term_scores[position] = score
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {position: score + term_scores[position]
+                              for position, score in scores.items() if position in term_scores}
+                if not scores:
+                    break
+
+        ranked = sorted(scores, key=lambda position: (-scores[position], position))
+        return np.array(ranked[:limit], dtype=int)
+
+
+_latest = {}
+_latest_lock = threading.Lock()
+
+
+def get_asset_search(snapshot):
+    """Return the search index of a snapshot.
+
+    After an incremental sync a new index is derived from the previous
+    snapshot's one, re-indexing only the changed rows instead of every row.
+    """
+    def build(snap):
+        with _latest_lock:
+            previous = _latest.get("search")
+            if (previous is not None
+                    and previous.version == snap.version - 1
+                    and snap.changed_rows is not None
+                    # Rows past the old end must all have been re-parsed
+                    and set(range(previous.size, len(snap.data))) <= set(snap.changed_rows)):
+                index = AssetSearch(snap.data, previous, snap.changed_rows)
+            else:
+                index = AssetSearch(snap.data)
+            index.version = snap.version
+            _latest["search"] = index
+            return index
+
+    return snapshot.derived("asset_search", build)
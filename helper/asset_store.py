@@ -0,0 +1,91 @@
+import os
+import threading
+from datetime import date
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+STORE_DIR = "data_store"
+
+# Read text back as Arrow strings, matching helper.asset_schema
+_STRING_TYPES = {
+    pa.string(): pd.StringDtype("pyarrow"),
+    pa.large_string(): pd.StringDtype("pyarrow"),
+}
+
+
+class AssetStore:
+    """Local columnar mirror of the asset sheet, queried with DuckDB.
+
+    Google Sheets stays the system of record: every synced snapshot is
+    written to assets.parquet (served on a cold start) and to one history
+    file per day, and the current snapshot is registered in DuckDB as the
+    "assets" table. "asset_history" spans every daily file, so questions
+    about past years can be answered with SQL without loading them into
+    any session. The dashboard filters themselves run on the in-memory
+    snapshot (helper.filter_engine); query() serves ad-hoc and historical
+    questions over the same data.
+    """
+
+    def __init__(self, path=STORE_DIR):
+        self.path = path
+        self.latest_path = os.path.join(path, "assets.parquet")
+        self.history_dir = os.path.join(path, "history")
+        self._lock = threading.Lock()
+        self._con = duckdb.connect()
+        self._has_history = False
+
+    def save(self, data):
+        """Write a new snapshot to disk and make it the "assets" table."""
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        os.makedirs(self.history_dir, exist_ok=True)
+
+        tmp_path = self.latest_path + ".tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, self.latest_path)
+
+        # The last sync of the day wins
+        day = date.today().isoformat()
+        history = table.append_column("snapshot_date", pa.array([day] * table.num_rows, pa.string()))
+        pq.write_table(history, os.path.join(self.history_dir, f"{day}.parquet"))
+
+        self._register(table)
+
+    def load(self):
+        """Return the last saved snapshot as a DataFrame, or None if there is none."""
+        if not os.path.exists(self.latest_path):
+            return None
+        table = pq.read_table(self.latest_path)
+        self._register(table)
+        return table.to_pandas(types_mapper=_STRING_TYPES.get)
+
+    def _register(self, table):
+        with self._lock:
+            self._con.register("assets", table)
+            if not self._has_history and os.path.isdir(self.history_dir):
+                pattern = os.path.join(self.history_dir, "*.parquet")
+                self._con.execute(
+                    f"CREATE OR REPLACE VIEW asset_history AS "
+                    f"SELECT * FROM read_parquet('{pattern}', union_by_name=true)"
+                )
+                self._has_history = True
+
+    def query(self, sql, params=None):
+        """Run SQL against "assets" / "asset_history" and return a DataFrame."""
+        with self._lock:
+            return self._con.execute(sql, params or []).df()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the process-wide asset store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AssetStore()
+        return _store
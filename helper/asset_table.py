@@ -0,0 +1,110 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from helper.depreciation import MONTH_NUMBERS, current_month_index, get_depreciation
+
+# Columns of the dashboard asset table, in display order
+TABLE_COLUMNS = ["Nomor Asset", "Nama Asset", "Tahun Beli", "Bulan Beli", "Nilai Buku"]
+PAGE_SIZES = [25, 50, 100, 250]
+# Sorted filter results remembered per snapshot
+ORDER_MEMO_SIZE = 32
+
+
+def positions_digest(positions):
+    """Short fingerprint of a set of row positions, for memo and session keys.
+
+    The raw bytes of 50k positions are ~400KB; the digest is 32 characters.
+    """
+    return hashlib.blake2b(np.asarray(positions, dtype=int).tobytes(), digest_size=16).hexdigest()
+
+
+class AssetTable:
+    """Server-side sorting and paging of the dashboard asset list.
+
+    Every sortable column is ranked once per snapshot, so ordering a filter
+    result is one argsort over integer ranks. Only the rows of the page on
+    screen are ever turned into a DataFrame for the browser.
+    """
+
+    def __init__(self, data, book_values):
+        self.data = data
+        self.book_values = np.asarray(book_values, dtype=float)
+        self._ranks = {}
+        self._missing = {}
+        self._orders = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _sort_values(self, column):
+        if column == "Nilai Buku":
+            return pd.Series(self.book_values)
+        values = self.data[column]
+        if column == "Bulan Beli":
+            return values.astype(str).str.strip().str.lower().map(MONTH_NUMBERS)
+        if column == "Tahun Beli":
+            return pd.to_numeric(values, errors="coerce")
+        return values.astype(str).str.strip().str.lower().replace("", np.nan)
+
+    def _rank(self, column):
+        # Position of each row in the ascending order of the column; missing values are flagged
+        with self._lock:
+            if column not in self._ranks:
+                values = self._sort_values(column)
+                missing = values.isna().to_numpy()
+                order = np.argsort(values.fillna(0 if values.dtype.kind in "fi" else "").to_numpy(), kind="stable")
+                rank = np.empty(len(order), dtype=np.int64)
+                rank[order] = np.arange(len(order))
+                self._ranks[column] = rank
+                self._missing[column] = missing
+            return self._ranks[column], self._missing[column]
+
+    def ordered(self, positions, sort_column=None, descending=False):
+        """The row positions sorted by a column, rows missing that value last."""
+        positions = np.asarray(positions, dtype=int)
+        if not sort_column:
+            return positions[::-1] if descending else positions
+
+        key = (positions_digest(positions), sort_column, descending)
+        with self._lock:
+            if key in self._orders:
+                self._orders.move_to_end(key)
+                return self._orders[key]
+
+        rank, missing = self._rank(sort_column)
+        rank = rank[positions]
+        ordered = positions[np.lexsort((-rank if descending else rank, missing[positions]))]
+        ordered.setflags(write=False)
+
+        with self._lock:
+            self._orders[key] = ordered
+            while len(self._orders) > ORDER_MEMO_SIZE:
+                self._orders.popitem(last=False)
+        return ordered
+
+    def page(self, positions, page_number, page_size, sort_column=None, descending=False):
+        """DataFrame with only the rows of one (1-based) page, plus their positions."""
+        window = self.ordered(positions, sort_column, descending)
+        start = (page_number - 1) * page_size
+        window = window[start:start + page_size]
+
+        columns = [column for column in TABLE_COLUMNS if column in self.data.columns]
+        rows = self.data.iloc[window][columns].reset_index(drop=True)
+        rows["Nilai Buku"] = self.book_values[window]
+        # Row labels continue across pages, so "row 101" is the first of page 2 at size 100
+        rows.index = pd.RangeIndex(start + 1, start + 1 + len(rows))
+        return rows, window
+
+
+def page_count(total, page_size):
+    return max(1, -(-total // page_size))
+
+
+def get_asset_table(snapshot):
+    """Return the shared asset table of a snapshot, with this month's book values."""
+    def build(snap):
+        return AssetTable(snap.data, get_depreciation(snap).figure_arrays["Nilai Buku"])
+
+    return snapshot.derived(f"asset_table:{current_month_index()}", build)
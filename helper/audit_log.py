@@ -0,0 +1,262 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+from googleapiclient.errors import HttpError
+
+from helper.asset_schema import cell_text
+from helper.gsheet_connection import GsheetConnection
+from helper.rate_limit import sheets_write_limiter
+
+AUDIT_DB = os.path.join("data_store", "audit_log.sqlite")
+# Changes mirrored to the history sheet per append, and how often the mirror runs
+MIRROR_BATCH = 500
+MIRROR_INTERVAL = 60
+HISTORY_HEADER = ["Waktu", "Nomor Asset", "Kolom", "Nilai Lama", "Nilai Baru", "Aksi", "Oleh"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    asset TEXT NOT NULL,
+    field TEXT NOT NULL,
+    old TEXT,
+    new TEXT,
+    action TEXT NOT NULL,
+    editor TEXT
+);
+CREATE INDEX IF NOT EXISTS changes_asset_ts ON changes (asset, ts);
+CREATE INDEX IF NOT EXISTS changes_ts ON changes (ts);
+CREATE TRIGGER IF NOT EXISTS changes_no_update BEFORE UPDATE ON changes
+BEGIN SELECT RAISE(ABORT, 'audit log is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS changes_no_delete BEFORE DELETE ON changes
+BEGIN SELECT RAISE(ABORT, 'audit log is append-only'); END;
+CREATE TABLE IF NOT EXISTS mirror_state (
+    sheet TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL,
+    pending_id INTEGER,
+    expect_rows INTEGER
+);
+"""
+
+
+def field_diff(before, after):
+    """(field, old, new) for every field whose value differs; either side may be None."""
+    before, after = before or {}, after or {}
+    diff = []
+    for field in dict.fromkeys(list(before) + list(after)):
+        old, new = cell_text(before.get(field)), cell_text(after.get(field))
+        if old != new:
+            diff.append((field, old, new))
+    return diff
+
+
+class AuditLog:
+    """Append-only, field-level change log of the asset sheet, kept in SQLite.
+
+    Every create, edit or delete is stored as one row per changed field, with
+    the old and new value, time, action and editor. Rows are indexed by asset
+    and time, and triggers reject updates and deletes, so the history can
+    only grow. The state of an asset at any moment is rebuilt from its
+    current values by undoing the changes made after that moment.
+    """
+
+    def __init__(self, path=AUDIT_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(path, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.executescript(_SCHEMA)
+        # Mirror state from before appends were tracked in flight
+        columns = [row[1] for row in self._con.execute("PRAGMA table_info(mirror_state)")]
+        for column in ("pending_id", "expect_rows"):
+            if column not in columns:
+                self._con.execute(f"ALTER TABLE mirror_state ADD COLUMN {column} INTEGER")
+
+    def record(self, asset_no, before, after, action="update", editor=None, when=None):
+        """Log the fields that differ between two versions of an asset row.
+
+        before is None for a new asset and after is None for a deleted one.
+        Returns the number of changed fields.
+        """
+        return self.record_many([(asset_no, before, after, action, editor)], when)
+
+    def record_many(self, entries, when=None):
+        """Log many (Nomor Asset, before, after, action, editor) entries in one transaction.
+
+        Returns the number of changed fields.
+        """
+        ts = when or time.time()
+        rows = [(ts, str(asset_no), field, old, new, action, editor)
+                for asset_no, before, after, action, editor in entries
+                for field, old, new in field_diff(before, after)]
+        if rows:
+            with self._lock, self._con:
+                self._con.executemany(
+                    "INSERT INTO changes (ts, asset, field, old, new, action, editor) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+        return len(rows)
+
+    def history(self, asset_no, limit=200):
+        """Most recent changes of one asset, newest first."""
+        with self._lock:
+            rows = self._con.execute(
+                "SELECT ts, field, old, new, action, editor FROM changes"
+                " WHERE asset = ? ORDER BY ts DESC, id DESC LIMIT ?",
+                (str(asset_no), limit),
+            ).fetchall()
+        history = pd.DataFrame(rows, columns=["Waktu", "Kolom", "Nilai Lama", "Nilai Baru", "Aksi", "Oleh"])
+        history["Waktu"] = pd.to_datetime(history["Waktu"].map(datetime.fromtimestamp))
+        return history
+
+    def changes_between(self, start, end):
+        """Every change in a time range (epoch seconds), oldest first."""
+        with self._lock:
+            rows = self._con.execute(
+                "SELECT ts, asset, field, old, new, action, editor FROM changes"
+                " WHERE ts >= ? AND ts < ? ORDER BY ts, id",
+                (start, end),
+            ).fetchall()
+        return pd.DataFrame(rows, columns=["ts", "asset", "field", "old", "new", "action", "editor"])
+
+    def state_as_of(self, asset_no, when, current=None):
+        """Field values (as text) of an asset at a moment (datetime or epoch seconds).
+
+        current is the asset's row now (None if it no longer exists). For each
+        field changed after the moment, its old value from the first such
+        change is put back. Returns None if the asset did not exist yet.
+        """
+        if isinstance(when, datetime):
+            when = when.timestamp()
+        with self._lock:
+            # Bare columns take their values from the MIN(id) row of each field
+            rows = self._con.execute(
+                "SELECT field, old, action, MIN(id) FROM changes WHERE asset = ? AND ts > ? GROUP BY field",
+                (str(asset_no), when),
+            ).fetchall()
+        if any(action == "create" for _, _, action, _ in rows):
+            return None
+        state = {field: cell_text(value) for field, value in (current or {}).items()}
+        for field, old, _, _ in rows:
+            state[field] = old
+        return state if any(value is not None for value in state.values()) else None
+
+    def _mirror_state(self, sheet):
+        with self._lock:
+            row = self._con.execute(
+                "SELECT last_id, pending_id, expect_rows FROM mirror_state WHERE sheet = ?", (sheet,)
+            ).fetchone()
+        return row or (0, None, None)
+
+    def _set_mirror_state(self, sheet, last_id, pending_id=None, expect_rows=None):
+        with self._lock, self._con:
+            self._con.execute(
+                "INSERT INTO mirror_state (sheet, last_id, pending_id, expect_rows) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(sheet) DO UPDATE SET last_id = excluded.last_id,"
+                " pending_id = excluded.pending_id, expect_rows = excluded.expect_rows",
+                (sheet, last_id, pending_id, expect_rows),
+            )
+
+    def _unmirrored(self, last_id, batch):
+        with self._lock:
+            return self._con.execute(
+                "SELECT id, ts, asset, field, old, new, action, editor FROM changes WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch),
+            ).fetchall()
+
+    def mirror(self, connection, sheet, batch=MIRROR_BATCH, limiter=None):
+        """Append the changes not yet mirrored to a history sheet; returns how many were sent.
+
+        Appends are not idempotent, so before sending, the batch is recorded
+        with the row count the sheet will have once it is in. If the append
+        then gets no answer, the next pass counts the sheet's rows to tell
+        whether it went through instead of sending it again.
+        """
+        last_id, pending_id, expect_rows = self._mirror_state(sheet)
+        rows = self._unmirrored(last_id, batch)
+        if not rows:
+            return 0
+
+        sheet_rows = len(connection.fetch_ranges([f"{sheet}!A:A"])[0])
+        if pending_id is not None and sheet_rows >= expect_rows:
+            # The previous append was applied after all
+            last_id = pending_id
+            self._set_mirror_state(sheet, last_id)
+            rows = self._unmirrored(last_id, batch)
+            if not rows:
+                return 0
+
+        # The header goes in only while the sheet is empty
+        values = [HISTORY_HEADER] if sheet_rows == 0 else []
+        values += [[datetime.fromtimestamp(ts).isoformat(sep=" ", timespec="seconds"), asset, field,
+                    old or "", new or "", action, editor or ""]
+                   for _, ts, asset, field, old, new, action, editor in rows]
+        self._set_mirror_state(sheet, last_id, rows[-1][0], sheet_rows + len(values))
+        # Same per-account write quota as the asset writer
+        (limiter or sheets_write_limiter()).wait()
+        connection.append_rows(values)
+        self._set_mirror_state(sheet, rows[-1][0])
+        return len(rows)
+
+
+_log = None
+_log_lock = threading.Lock()
+_mirrors = {}
+_mirrors_lock = threading.Lock()
+
+
+def get_audit_log():
+    """Return the process-wide audit log."""
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = AuditLog()
+        return _log
+
+
+def _open_history_sheet(connection):
+    """Create the history sheet if it does not exist; False if that is not allowed."""
+    try:
+        connection.sheet_id
+        return True
+    except ValueError:
+        pass
+    try:
+        connection.add_sheet()
+        return True
+    except HttpError as err:
+        if err.resp.status in (400, 403, 404):
+            # Retrying every MIRROR_INTERVAL would not help
+            print(f"Error: cannot create the {connection.sheet_name!r} sheet, the audit log is not mirrored: {err}")
+            return False
+        raise
+
+
+def start_mirror(token_json, scopes, spreadsheet_id, sheet_name):
+    """Start (once per sheet) a background thread copying new changes to a history sheet."""
+    log = get_audit_log()
+    with _mirrors_lock:
+        if sheet_name in _mirrors:
+            return
+
+        def run():
+            connection = GsheetConnection(token_json, scopes, spreadsheet_id, sheet_name)
+            ready = False
+            while True:
+                try:
+                    if not ready and not _open_history_sheet(connection):
+                        return
+                    ready = True
+                    # Keep appending while full batches come back, then wait for more
+                    while log.mirror(connection, sheet_name) == MIRROR_BATCH:
+                        pass
+                except Exception as err:
+                    print(f"Error: {err}")
+                time.sleep(MIRROR_INTERVAL)
+
+        _mirrors[sheet_name] = threading.Thread(target=run, daemon=True)
+        _mirrors[sheet_name].start()
@@ -0,0 +1,190 @@
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from helper.asset_schema import BULAN_OPTIONS
+
+# Month number (1-12) of each Indonesian month name, lower case
+MONTH_NUMBERS = {name.lower(): number for number, name in enumerate(BULAN_OPTIONS, start=1)}
+
+# Per-row figures added by the engine, in display order
+FIGURE_COLUMNS = [
+    "Nilai Buku", "Bulan Berjalan", "Total Bulan", "Sisa Bulan", "Habis Nilai", "Progres Penyusutan",
+]
+
+
+def month_index(year, month):
+    """Months since year 0; every date in the engine is counted this way."""
+    return int(year) * 12 + int(month) - 1
+
+
+def current_month_index(today=None):
+    today = today or date.today()
+    return month_index(today.year, today.month)
+
+
+def month_label(index):
+    """'Januari 2025' style label for a month index."""
+    year, month = divmod(int(index), 12)
+    return f"{BULAN_OPTIONS[month]} {year}"
+
+
+def _inputs(data):
+    # Straight-line depreciation needs price, monthly amount and purchase month
+    def number(column):
+        if column not in data.columns:
+            return np.zeros(len(data))
+        return pd.to_numeric(data[column], errors="coerce").fillna(0).to_numpy(dtype=float)
+
+    price = number("Harga Perolehan")
+    rate = number("Nilai Penyusutan per Bulan")
+    year = number("Tahun Beli")
+    if "Bulan Beli" in data.columns:
+        month = (data["Bulan Beli"].astype(str).str.strip().str.lower()
+                 .map(MONTH_NUMBERS).fillna(1).to_numpy(dtype=float))
+    else:
+        month = np.ones(len(data))
+
+    valid = year > 0
+    depreciating = valid & (rate > 0)
+    start = np.where(valid, year * 12 + month - 1, 0)
+    # Whole months until the book value reaches zero (the last month may be partial)
+    total = np.where(depreciating, np.floor(price / np.where(depreciating, rate, 1)), 0)
+    return {"price": price, "rate": rate, "start": start, "total": total,
+            "valid": valid, "depreciating": depreciating}
+
+
+def _figures(inputs, as_of):
+    price, rate, start, total = inputs["price"], inputs["rate"], inputs["start"], inputs["total"]
+    valid, depreciating = inputs["valid"], inputs["depreciating"]
+
+    elapsed = np.where(valid, np.maximum(0, as_of - start), 0)
+    book_value = np.where(depreciating, np.maximum(0, price - rate * elapsed), price)
+    # Not bought yet: nothing on the books
+    book_value = np.where(valid & (as_of < start), 0, book_value)
+    end = start + total
+    remaining = np.where(depreciating, np.maximum(0, end - as_of), 0)
+    progress = np.where(total > 0, np.minimum(1.0, elapsed / np.where(total > 0, total, 1)), 0)
+    # datetime64[M] counts months from January 1970
+    end_date = np.where(depreciating, end - 1970 * 12, 0).astype("int64").astype("datetime64[M]")
+    end_date[~depreciating] = np.datetime64("NaT")
+
+    return {
+        "Nilai Buku": book_value,
+        "Bulan Berjalan": elapsed,
+        "Total Bulan": total,
+        "Sisa Bulan": remaining,
+        "Habis Nilai": end_date,
+        "Progres Penyusutan": progress,
+    }
+
+
+class DepreciationEngine:
+    """Straight-line depreciation for every asset of a snapshot at once.
+
+    Inputs are parsed into NumPy arrays once; figures as of the current month
+    are in .figures (a DataFrame aligned with the snapshot), and any other
+    month or the yearly schedule is a single broadcast over those arrays.
+    """
+
+    def __init__(self, data, as_of, previous=None, changed_rows=None):
+        self.as_of = as_of
+        self.index = data.index
+        if previous is None:
+            self.inputs = _inputs(data)
+            figures = _figures(self.inputs, as_of)
+        else:
+            # Copy what the previous snapshot computed and redo only the changed rows
+            size = len(data)
+            keep = min(size, len(previous.index))
+            changed = np.asarray(sorted(changed_rows), dtype=int)
+            self.inputs = {}
+            for name, values in previous.inputs.items():
+                updated = np.empty(size, dtype=values.dtype)
+                updated[:keep] = values[:keep]
+                self.inputs[name] = updated
+            figures = {}
+            for name, values in previous.figure_arrays.items():
+                updated = np.empty(size, dtype=values.dtype)
+                updated[:keep] = values[:keep]
+                figures[name] = updated
+
+            if len(changed):
+                changed_inputs = _inputs(data.iloc[changed])
+                for name, values in changed_inputs.items():
+                    self.inputs[name][changed] = values
+                for name, values in _figures(changed_inputs, as_of).items():
+                    figures[name][changed] = values
+
+        self.figure_arrays = figures
+        self.figures = pd.DataFrame(figures, index=self.index)
+
+    def can_update(self, data, as_of, changed_rows):
+        """Whether the next snapshot can be derived from this one row by row."""
+        if changed_rows is None or as_of != self.as_of:
+            return False
+        if len(data) > len(self.index):
+            # Rows past the old end must all have been re-parsed
+            changed = set(changed_rows)
+            return all(row in changed for row in range(len(self.index), len(data)))
+        return True
+
+    def book_value_at(self, months):
+        """Book values of every asset at each month index: an (assets, months) matrix."""
+        months = np.asarray(months, dtype=float)
+        elapsed = np.maximum(0, months[None, :] - self.inputs["start"][:, None])
+        elapsed = np.where(self.inputs["valid"][:, None], elapsed, 0)
+        depreciated = np.maximum(0, self.inputs["price"][:, None] - self.inputs["rate"][:, None] * elapsed)
+        values = np.where(self.inputs["depreciating"][:, None], depreciated, self.inputs["price"][:, None])
+        # Zero in the months before the asset was bought
+        return np.where(self.owned_at(months), values, 0)
+
+    def owned_at(self, months):
+        """Whether each asset had been bought by each month index: an (assets, months) matrix.
+
+        Assets without a purchase year count as always owned.
+        """
+        months = np.asarray(months, dtype=float)
+        return ~self.inputs["valid"][:, None] | (months[None, :] >= self.inputs["start"][:, None])
+
+    def yearly_schedule(self, years):
+        """Book value after each full year since purchase: an (assets, years) matrix.
+
+        Same figures as the detail page chart, whose x axis starts at Tahun Beli.
+        """
+        yearly = self.inputs["rate"][:, None] * 12 * np.arange(1, years + 1)[None, :]
+        return np.maximum(0, self.inputs["price"][:, None] - yearly)
+
+    def total_book_value(self, rows=None):
+        values = self.figure_arrays["Nilai Buku"]
+        return float(values.sum() if rows is None else values[rows].sum())
+
+
+_latest = {}
+_latest_lock = threading.Lock()
+
+
+def get_depreciation(snapshot, today=None):
+    """Return the shared engine of a snapshot for the current month.
+
+    When the snapshot came from an incremental sync of the one the engine was
+    last built for, only the changed rows are recomputed.
+    """
+    as_of = current_month_index(today)
+
+    def build(snap):
+        with _latest_lock:
+            previous = _latest.get("engine")
+            if (previous is not None
+                    and previous.version == snap.version - 1
+                    and previous.can_update(snap.data, as_of, snap.changed_rows)):
+                engine = DepreciationEngine(snap.data, as_of, previous, snap.changed_rows)
+            else:
+                engine = DepreciationEngine(snap.data, as_of)
+            engine.version = snap.version
+            _latest["engine"] = engine
+            return engine
+
+    return snapshot.derived(f"depreciation:{as_of}", build)
@@ -0,0 +1,39 @@
+import re
+
+from googleapiclient.http import MediaIoBaseDownload
+
+from helper.google_clients import get_service
+
+# Drive downloads are streamed to disk in chunks of this many bytes
+DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def get_drive_service(token_json, scopes):
+    """Shared Drive client; see helper.google_clients."""
+    return get_service("drive", "v3", token_json, scopes)
+
+
+def extract_folder_id(drive_url):
+    match = re.search(r"drive\.google\.com/drive/folders/([a-zA-Z0-9_-]+)", drive_url)
+    return match.group(1) if match else None
+
+
+def list_images_in_folder(service, folder_id):
+    """Image files in a folder, with the checksum and modified time used as cache keys."""
+    query = f"'{folder_id}' in parents and mimeType contains 'image/' and trashed=false"
+    results = service.files().list(
+        q=query,
+        fields="files(id, name, mimeType, md5Checksum, modifiedTime, size)",
+    ).execute()
+    return results.get("files", [])
+
+
+def download_file(service, file_id, path):
+    """Stream a Drive file to path without holding it in memory."""
+    request = service.files().get_media(fileId=file_id)
+    with open(path, "wb") as f:
+        downloader = MediaIoBaseDownload(f, request, chunksize=DOWNLOAD_CHUNK_SIZE)
+        done = False
+        while not done:
+            _, done = downloader.next_chunk()
+    return path
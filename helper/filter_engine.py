@@ -0,0 +1,109 @@
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from helper.depreciation import current_month_index, get_depreciation
+
+# Sidebar multiselect filters
+CATEGORY_FILTERS = ["PENEMPATAN ASET", "Sumber", "Kelompok Aset", "Kepemilikan", "Bulan Beli"]
+# Sidebar range sliders
+RANGE_FILTERS = ["Tahun Beli", "Harga Perolehan"]
+# Filter results remembered per snapshot
+MEMO_SIZE = 64
+
+
+class FilterEngine:
+    """Precomputed indexes for the dashboard filters of one snapshot.
+
+    Category columns are kept as integer codes and numeric columns as NumPy
+    arrays, so a filter state is answered by combining boolean masks over
+    those arrays, with no DataFrame copies. Option lists and slider bounds
+    are computed once, and results are memoized by filter state.
+    """
+
+    def __init__(self, data, extra_ranges=None):
+        self.size = len(data)
+        self._codes = {}
+        self._categories = {}
+        self.options = {}
+        for column in CATEGORY_FILTERS:
+            if column not in data.columns:
+                continue
+            values = data[column].astype("category") if data[column].dtype != "category" else data[column]
+            self._codes[column] = values.cat.codes.to_numpy()
+            self._categories[column] = {value: code for code, value in enumerate(values.cat.categories)}
+            # Same order as .dropna().unique(): first appearance in the sheet
+            self.options[column] = values.dropna().unique().tolist()
+
+        self._ranges = {}
+        for column in RANGE_FILTERS:
+            if column in data.columns:
+                self._ranges[column] = pd.to_numeric(data[column], errors="coerce").to_numpy(dtype=float)
+        for column, values in (extra_ranges or {}).items():
+            self._ranges[column] = np.asarray(values, dtype=float)
+
+        # Whole-number slider bounds that still include the extreme values
+        self.bounds = {}
+        for column, values in self._ranges.items():
+            finite = values[~np.isnan(values)]
+            self.bounds[column] = (math.floor(finite.min()), math.ceil(finite.max())) if len(finite) else (0, 0)
+
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _category_mask(self, column, selected):
+        categories = self._categories[column]
+        # Lookup table indexed by code; the extra last slot is hit by code -1 (missing)
+        allowed = np.zeros(len(categories) + 1, dtype=bool)
+        for value in selected:
+            if value in categories:
+                allowed[categories[value]] = True
+        return allowed[self._codes[column]]
+
+    def _range_mask(self, column, low, high):
+        values = self._ranges[column]
+        return (values >= low) & (values <= high)
+
+    def positions(self, categories=None, ranges=None):
+        """Row positions matching every filter.
+
+        categories maps a column to the selected values (empty means no
+        filter); ranges maps a column to an inclusive (low, high). A range
+        covering the column's full bounds is no filter, so rows with a
+        missing value are only dropped once the slider is narrowed.
+        """
+        categories = {column: tuple(sorted(values, key=str)) for column, values in (categories or {}).items() if values}
+        ranges = {column: (float(low), float(high)) for column, (low, high) in (ranges or {}).items()
+                  if column in self.bounds and (low > self.bounds[column][0] or high < self.bounds[column][1])}
+        key = (tuple(sorted(categories.items())), tuple(sorted(ranges.items())))
+
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+
+        mask = np.ones(self.size, dtype=bool)
+        for column, values in categories.items():
+            mask &= self._category_mask(column, values)
+        for column, (low, high) in ranges.items():
+            mask &= self._range_mask(column, low, high)
+        positions = np.flatnonzero(mask)
+        positions.setflags(write=False)
+
+        with self._lock:
+            self._memo[key] = positions
+            while len(self._memo) > MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return positions
+
+
+def get_filter_engine(snapshot):
+    """Return the shared filter engine of a snapshot, with current book values as a range."""
+    def build(snap):
+        book_values = get_depreciation(snap).figure_arrays["Nilai Buku"]
+        return FilterEngine(snap.data, {"Nilai Buku": book_values})
+
+    return snapshot.derived(f"filter_engine:{current_month_index()}", build)
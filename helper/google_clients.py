@@ -0,0 +1,101 @@
+import threading
+
+import httplib2
+from google.auth.exceptions import TransportError
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
+
+
+# Quota and server errors worth retrying
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def is_transient(err):
+    """Whether an error may go away by itself (quota, server or network trouble)."""
+    if isinstance(err, HttpError):
+        return err.resp.status in RETRY_STATUSES
+    return isinstance(err, (ConnectionError, TimeoutError, OSError, httplib2.HttpLib2Error, TransportError))
+
+
+class SharedCredentials(Credentials):
+    """OAuth credentials shared by every session thread.
+
+    Refreshing happens in memory, one thread at a time; threads that were
+    waiting reuse the new token instead of refreshing again.
+    """
+
+    _refresh_lock = threading.Lock()
+
+    def refresh(self, request):
+        with self._refresh_lock:
+            if self.valid:
+                return
+            super().refresh(request)
+
+
+class HttpPool:
+    """Thread-safe stand-in for the client's httplib2.Http.
+
+    An httplib2 connection must not be used by two threads at once, so each
+    request borrows an idle authorized connection (keeping it open between
+    requests) and hands it back afterwards; new ones are only opened while
+    all others are busy.
+    """
+
+    def __init__(self, credentials):
+        self._credentials = credentials
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def request(self, *args, **kwargs):
+        with self._lock:
+            http = self._idle.pop() if self._idle else None
+        if http is None:
+            http = AuthorizedHttp(self._credentials, http=build_http())
+        response = http.request(*args, **kwargs)
+        # A connection that raised is dropped rather than reused
+        with self._lock:
+            self._idle.append(http)
+        return response
+
+
+_credentials = {}
+_credentials_lock = threading.Lock()
+_services = {}
+_services_lock = threading.Lock()
+
+
+def _credentials_key(token_json, scopes):
+    return (token_json.get("client_id"), token_json.get("refresh_token"), tuple(scopes))
+
+
+def get_credentials(token_json, scopes):
+    """Return the process-wide credentials for an authorized-user token dict."""
+    key = _credentials_key(token_json, scopes)
+    with _credentials_lock:
+        if key not in _credentials:
+            _credentials[key] = SharedCredentials.from_authorized_user_info(token_json, scopes)
+        creds = _credentials[key]
+
+    if not creds.valid:
+        creds.refresh(Request())
+    return creds
+
+
+def get_service(api, version, token_json, scopes):
+    """Return the process-wide API client, built once and then reused.
+
+    Building parses the discovery document, so it happens once per API;
+    the client sends through an HttpPool, so session threads (which
+    Streamlit starts anew for most reruns) share its open connections.
+    """
+    creds = get_credentials(token_json, scopes)
+    key = (api, version, _credentials_key(token_json, scopes))
+    with _services_lock:
+        if key not in _services:
+            _services[key] = build(api, version, http=HttpPool(creds), cache_discovery=False)
+        return _services[key]
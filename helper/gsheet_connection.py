@@ -1,110 +1,122 @@
-import os
 import pandas as pd
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-import json
+
+from helper.asset_schema import build_frame
+from helper.google_clients import get_credentials, get_service
+
+
+def parse_values(values):
+    """Turn raw sheet values (header row first) into a DataFrame."""
+    if not values:
+        return pd.DataFrame()
+    return build_frame(values[0], values[1:])
+
 
 class GsheetConnection:
     def __init__(self, token_json, scopes, spreadsheet_id, sheet_name):
-        # Convert the embedded JSON to a temporary credentials file
-        json_path = "token_sheet.json"
-        with open(json_path, "w") as json_file:
-            json.dump(token_json, json_file)
-
-        self.token_json = json_path
+        self.token_json = token_json
         self.scopes = scopes
         self.spreadsheet_id = spreadsheet_id
         self.sheet_name = sheet_name
-        self.service = self.authenticate_google_sheets()
-
-    def authenticate_google_sheets(self):
-        creds = None
-        if os.path.exists(self.token_json):
-            creds = Credentials.from_authorized_user_file(self.token_json, self.scopes)
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-        return build("sheets", "v4", credentials=creds)
-
-    def get_data(self):
-        try:
-            result = self.service.spreadsheets().values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range=f"{self.sheet_name}"
-            ).execute()
-            data = result.get("values", [])
-            if data:
-                df = pd.DataFrame(data[1:], columns=data[0])
-
-                # Define columns that should be numeric
-                numeric_columns = [
-                    "Qty", "Harga Perolehan", "Tahun Beli", "Umur Ekonomis",
-                    "Nilai Penyusutan per Bulan", "VALUASI ASSET 2019",
-                    "VALUASI ASSET 2020", "VALUASI ASSET 2021",
-                    "VALUASI ASSET 2022", "VALUASI ASSET 2023",
-                    "VALUASI ASSET 2024", "VALUASI ASSET 2025",
-                    "Nilai Buku 2024"
-                ]
-
-                # Clean and convert numeric columns
-                for col in numeric_columns:
-                    if col in df.columns:
-                        df[col] = (
-                            df[col]
-                            .astype(str)  # Ensure all values are strings before cleaning
-                            .str.replace(r"[^\d.-]", "", regex=True)  # Remove non-numeric characters
-                            .replace("-", "0")  # Convert dashes to zero
-                            .replace("", "0")  # Replace empty strings with 0
-                            .astype(float)  # Convert to float
-                        )
-                return df
-            return pd.DataFrame()
-        except HttpError as err:
-            return pd.DataFrame()
-
-    def append_data(self, new_row):
-        try:
-            body = {"values": [new_row]}
-            self.service.spreadsheets().values().append(
-                spreadsheetId=self.spreadsheet_id,
-                range=f"{self.sheet_name}",
-                valueInputOption="USER_ENTERED",
-                insertDataOption="INSERT_ROWS",
-                body=body
-            ).execute()
-        except HttpError as err:
-            print(f"Error: {err}")
+        self.creds = get_credentials(token_json, scopes)
+        self._sheet_id = None
+
+    @property
+    def service(self):
+        # Shared client with pooled connections, so a connection can be used from any session thread
+        return get_service("sheets", "v4", self.token_json, self.scopes)
 
-    def update_data(self, index, updated_row, update_range):
-        try:
-            body = {"values": [updated_row]}
-            self.service.spreadsheets().values().update(
+    @property
+    def drive_service(self):
+        return get_service("drive", "v3", self.token_json, self.scopes)
+
+    def fetch_values(self):
+        """Download the raw cell values of the sheet, header row first."""
+        result = self.service.spreadsheets().values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=f"{self.sheet_name}"
+        ).execute()
+        return result.get("values", [])
+
+    def fetch_ranges(self, ranges):
+        """Raw values of several A1 ranges in one values.batchGet request, in order."""
+        result = self.service.spreadsheets().values().batchGet(
+            spreadsheetId=self.spreadsheet_id,
+            ranges=list(ranges)
+        ).execute()
+        return [value_range.get("values", []) for value_range in result.get("valueRanges", [])]
+
+    @property
+    def sheet_id(self):
+        """Numeric id of the sheet (tab), looked up by name once; row deletes need it."""
+        if self._sheet_id is None:
+            result = self.service.spreadsheets().get(
                 spreadsheetId=self.spreadsheet_id,
-                range=update_range,  # Use the dynamically determined range
-                valueInputOption="USER_ENTERED",
-                body=body
+                fields="sheets.properties(sheetId,title)"
             ).execute()
-        except HttpError as err:
-            print(f"Error: {err}")
+            for sheet in result.get("sheets", []):
+                if sheet["properties"]["title"] == self.sheet_name:
+                    self._sheet_id = sheet["properties"]["sheetId"]
+                    break
+            else:
+                raise ValueError(f"Sheet {self.sheet_name!r} not found in the spreadsheet")
+        return self._sheet_id
 
-    def delete_data(self, index):
-        try:
-            self.service.spreadsheets().batchUpdate(
-                spreadsheetId=self.spreadsheet_id,
-                body={
-                    "requests": [{
-                        "deleteDimension": {
-                            "range": {
-                                "sheetId": 0,
-                                "dimension": "ROWS",
-                                "startIndex": index+1,
-                                "endIndex": index+2
-                            }
-                        }
-                    }]
+    def add_sheet(self):
+        """Create the sheet (tab) in the spreadsheet; HttpError propagates to the caller."""
+        result = self.service.spreadsheets().batchUpdate(
+            spreadsheetId=self.spreadsheet_id,
+            body={"requests": [{"addSheet": {"properties": {"title": self.sheet_name}}}]}
+        ).execute()
+        self._sheet_id = result["replies"][0]["addSheet"]["properties"]["sheetId"]
+        return self._sheet_id
+
+    def fetch_data(self):
+        """Download and parse the sheet, letting HttpError propagate to the caller."""
+        return parse_values(self.fetch_values())
+
+    def get_revision(self):
+        """Return the Drive version of the spreadsheet, which changes on every edit."""
+        result = self.drive_service.files().get(
+            fileId=self.spreadsheet_id,
+            fields="version"
+        ).execute()
+        return result.get("version")
+
+    def append_rows(self, rows):
+        """Append many rows in one request. HttpError propagates to the caller."""
+        self.service.spreadsheets().values().append(
+            spreadsheetId=self.spreadsheet_id,
+            range=f"{self.sheet_name}",
+            valueInputOption="USER_ENTERED",
+            insertDataOption="INSERT_ROWS",
+            body={"values": rows}
+        ).execute()
+
+    def update_rows(self, updates):
+        """Write many (range, row) pairs in one values.batchUpdate request."""
+        self.service.spreadsheets().values().batchUpdate(
+            spreadsheetId=self.spreadsheet_id,
+            body={
+                "valueInputOption": "USER_ENTERED",
+                "data": [{"range": update_range, "values": [row]} for update_range, row in updates]
+            }
+        ).execute()
+
+    def delete_rows(self, indexes):
+        """Delete many data rows (0-based, header excluded) in one batchUpdate request."""
+        # Bottom-up so earlier deletions do not shift the rows still to be deleted
+        sheet_id = self.sheet_id
+        requests = [{
+            "deleteDimension": {
+                "range": {
+                    "sheetId": sheet_id,
+                    "dimension": "ROWS",
+                    "startIndex": index+1,
+                    "endIndex": index+2
                 }
-            ).execute()
-        except HttpError as err:
-            print(f"Error: {err}")
+            }
+        } for index in sorted(set(indexes), reverse=True)]
+        self.service.spreadsheets().batchUpdate(
+            spreadsheetId=self.spreadsheet_id,
+            body={"requests": requests}
+        ).execute()
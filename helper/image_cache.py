@@ -0,0 +1,259 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from googleapiclient.errors import HttpError
+from PIL import Image, ImageOps
+
+from helper.drive_connection import extract_folder_id, list_images_in_folder, download_file
+
+IMAGE_CACHE_DIR = "image_cache"
+# Disk budget for originals and variants together; least recently used go first
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+# Seconds a folder listing is trusted before Drive is asked again
+FOLDER_TTL = 3600
+# Background loads for pages that render while their image is fetched
+LOAD_WORKERS = 4
+# Seconds a handed-out path is kept from eviction, so the page can still read it
+IN_USE_SECONDS = 60
+# Downscaled copies kept next to the original: longest edge in pixels
+VARIANTS = {
+    "thumb": 320,
+    "display": 1280,
+}
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class ImageCache:
+    """Disk cache of Drive images keyed by file ID and content checksum.
+
+    Each image is stored once as downloaded plus a JPEG per variant, so an
+    asset that was opened before costs no Drive calls at all. A changed
+    file on Drive gets a new checksum and therefore a new cache entry; the
+    old one ages out under the LRU disk budget.
+    """
+
+    def __init__(self, cache_dir=IMAGE_CACHE_DIR, max_bytes=MAX_CACHE_BYTES, folder_ttl=FOLDER_TTL):
+        self.image_dir = os.path.join(cache_dir, "images")
+        self.folder_dir = os.path.join(cache_dir, "folders")
+        self.max_bytes = max_bytes
+        self.folder_ttl = folder_ttl
+        os.makedirs(self.image_dir, exist_ok=True)
+        os.makedirs(self.folder_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._file_locks = {}  # key -> (lock, threads using it); dropped when unused
+        self._folders = {}
+        # File name -> size, least recently used first
+        self._entries = OrderedDict()
+        self._total = 0
+        self._handed_out = {}  # file name -> when its path was last returned
+        self._busy = set()     # files being downloaded, or read for a variant
+        self._no_variant = set()  # variants that cannot be made; the original is served
+
+        # Pick up what earlier runs left behind, oldest access first
+        files = []
+        for name in os.listdir(self.image_dir):
+            path = os.path.join(self.image_dir, name)
+            if name.endswith(".tmp"):
+                os.remove(path)
+                continue
+            stat = os.stat(path)
+            files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total += size
+        with self._lock:
+            self._evict()
+
+    def _acquire(self, key):
+        with self._lock:
+            lock, users = self._file_locks.get(key, (None, 0))
+            lock = lock or threading.Lock()
+            self._file_locks[key] = (lock, users + 1)
+        lock.acquire()
+
+    def _release(self, key):
+        with self._lock:
+            lock, users = self._file_locks.pop(key)
+            if users > 1:
+                self._file_locks[key] = (lock, users - 1)
+        lock.release()
+
+    def _evict(self):
+        # Caller must hold the lock. Files handed out in the last IN_USE_SECONDS or being
+        # read for a variant are skipped; the budget may be exceeded until they free up
+        now = time.time()
+        for name in list(self._entries):
+            if self._total <= self.max_bytes:
+                break
+            if name in self._busy or now - self._handed_out.get(name, 0) < IN_USE_SECONDS:
+                continue
+            self._total -= self._entries.pop(name)
+            self._handed_out.pop(name, None)
+            try:
+                os.remove(os.path.join(self.image_dir, name))
+            except OSError:
+                pass
+
+    def _touch(self, name):
+        """Mark a cached file as just used and handed out; False if it is not cached."""
+        with self._lock:
+            if name not in self._entries:
+                return False
+            self._entries.move_to_end(name)
+            self._handed_out[name] = time.time()
+        # The mtime keeps the LRU order across restarts
+        try:
+            os.utime(os.path.join(self.image_dir, name))
+        except OSError:
+            pass
+        return True
+
+    def _add(self, name):
+        size = os.path.getsize(os.path.join(self.image_dir, name))
+        with self._lock:
+            self._total += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+            self._evict()
+
+    def list_folder(self, folder_id, service_factory):
+        """Image files of a Drive folder, listed at most once per FOLDER_TTL."""
+        listing = self._folders.get(folder_id)
+        listing_path = os.path.join(self.folder_dir, f"{folder_id}.json")
+        if listing is None and os.path.exists(listing_path):
+            with open(listing_path) as f:
+                listing = json.load(f)
+
+        if listing is not None and time.time() - listing["listed_at"] < self.folder_ttl:
+            self._folders[folder_id] = listing
+            return listing["files"]
+
+        try:
+            files = list_images_in_folder(service_factory(), folder_id)
+        except HttpError as err:
+            print(f"Error: {err}")
+            # An old listing is better than no image
+            return listing["files"] if listing is not None else []
+
+        listing = {"listed_at": time.time(), "files": files}
+        self._folders[folder_id] = listing
+        tmp_path = f"{listing_path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(listing, f)
+            os.replace(tmp_path, listing_path)
+        except Exception:
+            _remove(tmp_path)
+            raise
+        return files
+
+    def get(self, meta, service_factory, variant="display"):
+        """Local path of a Drive image (a files().list entry), downloading it only once.
+
+        variant is "original" or one of VARIANTS.
+        """
+        version = meta.get("md5Checksum") or meta.get("modifiedTime", "").replace(":", "")
+        base = f"{meta['id']}_{version}"
+        extension = os.path.splitext(meta.get("name", ""))[1].lower() or ".jpg"
+        original = base + extension
+        name = original if variant == "original" else f"{base}_{variant}.jpg"
+
+        if name in self._no_variant:
+            name = original
+        if self._touch(name):
+            return os.path.join(self.image_dir, name)
+
+        working = (original, name)
+        self._acquire(base)
+        try:
+            with self._lock:
+                self._busy.update(working)
+            # Another thread may have fetched it while we were waiting
+            if name not in self._entries:
+                if original not in self._entries:
+                    tmp_path = os.path.join(self.image_dir, f"{original}.{threading.get_ident()}.tmp")
+                    try:
+                        download_file(service_factory(), meta["id"], tmp_path)
+                        os.replace(tmp_path, os.path.join(self.image_dir, original))
+                    except Exception:
+                        # A half-written download would otherwise stay on disk for good
+                        _remove(tmp_path)
+                        raise
+                    self._add(original)
+                if name != original and not self._make_variant(original, name, VARIANTS[variant]):
+                    # Remembered, so the original is not opened again on every call
+                    self._no_variant.add(name)
+                    name = original
+            self._touch(name)
+        finally:
+            with self._lock:
+                self._busy.difference_update(working)
+            self._release(base)
+        return os.path.join(self.image_dir, name)
+
+    def _make_variant(self, original, name, max_size):
+        tmp_path = os.path.join(self.image_dir, f"{name}.{threading.get_ident()}.tmp")
+        try:
+            with Image.open(os.path.join(self.image_dir, original)) as img:
+                if img.format == "JPEG" and max(img.size) <= max_size:
+                    return False  # already small enough, re-encoding would only grow it
+                # Let the JPEG decoder downscale while decoding
+                img.draft("RGB", (max_size, max_size))
+                img = ImageOps.exif_transpose(img)
+                img.thumbnail((max_size, max_size))
+                img.convert("RGB").save(tmp_path, format="JPEG", quality=85, optimize=True)
+            os.replace(tmp_path, os.path.join(self.image_dir, name))
+        except Exception as err:
+            # Formats PIL cannot read are served as downloaded
+            print(f"Error: {err}")
+            _remove(tmp_path)
+            return False
+        self._add(name)
+        return True
+
+
+_image_cache = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    """Return the process-wide image cache."""
+    global _image_cache
+    with _image_cache_lock:
+        if _image_cache is None:
+            _image_cache = ImageCache()
+        return _image_cache
+
+
+def get_asset_image(drive_url, service_factory, variant="display"):
+    """Path of the first image in an asset's Dokumentasi folder, or None.
+
+    service_factory() builds a Drive service and is only called on a cache miss.
+    """
+    folder_id = extract_folder_id(str(drive_url or ""))
+    if not folder_id:
+        return None
+
+    cache = get_image_cache()
+    files = cache.list_folder(folder_id, service_factory)
+    if not files:
+        return None
+    return cache.get(files[0], service_factory, variant)
+
+
+_loader = ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix="image-load")
+
+
+def load_asset_image(drive_url, service_factory, variant="display"):
+    """Start get_asset_image() in the background and return its Future."""
+    return _loader.submit(get_asset_image, drive_url, service_factory, variant)
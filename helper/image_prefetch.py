@@ -0,0 +1,73 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from helper.drive_connection import get_drive_service
+from helper.image_cache import get_asset_image
+from helper.rate_limit import RateLimiter
+
+# Dashboard rows (of the current filter) whose images are fetched ahead of a click
+PREFETCH_ROWS = 20
+# Concurrent downloads, sharing the pooled Drive client
+MAX_WORKERS = 4
+# Drive calls per second across all workers, well under the per-user quota
+MAX_CALLS_PER_SECOND = 5
+# Folders waiting for a worker; later requests are dropped rather than piling up
+MAX_PENDING = 100
+# Variants made for each prefetched image; both come from one download
+PREFETCH_VARIANTS = ("display", "thumb")
+
+
+class ImagePrefetcher:
+    """Warms the image cache in the background for assets likely to be opened.
+
+    prefetch() returns immediately; a small thread pool lists and downloads
+    the images, with every Drive call going through a shared rate limiter.
+    Assets that are already cached cost no Drive calls.
+    """
+
+    def __init__(self, service_factory, max_workers=MAX_WORKERS, rate=MAX_CALLS_PER_SECOND):
+        self._service_factory = service_factory
+        self._limiter = RateLimiter(rate)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-prefetch")
+        self._lock = threading.Lock()
+        self._queued = set()
+
+    def _limited_service(self):
+        # The image cache asks for a service right before each Drive call
+        self._limiter.wait()
+        return self._service_factory()
+
+    def _fetch(self, drive_url):
+        try:
+            for variant in PREFETCH_VARIANTS:
+                get_asset_image(drive_url, self._limited_service, variant)
+        except Exception as err:
+            print(f"Error: {err}")
+        finally:
+            with self._lock:
+                self._queued.discard(drive_url)
+
+    def prefetch(self, drive_urls):
+        """Queue Dokumentasi folder URLs, most important first."""
+        for drive_url in drive_urls:
+            drive_url = str(drive_url or "").strip()
+            if not drive_url or drive_url == "-":
+                continue
+            with self._lock:
+                if drive_url in self._queued or len(self._queued) >= MAX_PENDING:
+                    continue
+                self._queued.add(drive_url)
+            self._executor.submit(self._fetch, drive_url)
+
+
+_prefetchers = {}
+_prefetchers_lock = threading.Lock()
+
+
+def get_prefetcher(token_json, scopes):
+    """Return the process-wide prefetcher for a Drive account."""
+    with _prefetchers_lock:
+        key = (token_json.get("client_id"), token_json.get("refresh_token"))
+        if key not in _prefetchers:
+            _prefetchers[key] = ImagePrefetcher(lambda: get_drive_service(token_json, scopes))
+        return _prefetchers[key]
@@ -0,0 +1,399 @@
+import hashlib
+import os
+import textwrap
+import threading
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from io import BytesIO
+
+import qrcode
+from PIL import Image, ImageDraw, ImageFont
+
+from helper.process_pool import get_process_pool
+
+DPI = 300
+
+# Declarative label templates. Positions are fractions of the label size so a
+# template can be reused at another size; fonts are (path, size in px).
+TEMPLATES = {
+    "standard": {
+        "size_mm": (60, 40),
+        # Left half is a black panel holding the QR code and the logo
+        "panel": 0.5,
+        "qr": {"size": 0.5, "top": 0.1},
+        "logo": {"path": "assets/RHF LOGO WHITE.png", "height": 0.3, "gap": 0.04},
+        # Right half: asset name top-left, asset number bottom-right
+        "name": {"font": ("assets/PlusJakartaSans-ExtraBold.ttf", 36), "wrap": 14,
+                 "spacing": 10, "left": 0.02, "top": 0.07},
+        "number": {"font": ("assets/PlusJakartaSans-Bold.ttf", 32), "wrap": 12,
+                   "line_gap": 6, "right": 0.04, "bottom": 0.1},
+    },
+}
+DEFAULT_TEMPLATE = "standard"
+
+# Physical label size in millimetres
+LABEL_SIZE_MM = TEMPLATES[DEFAULT_TEMPLATE]["size_mm"]
+
+# Output formats a label can be rendered to
+FORMATS = {
+    "PDF": "application/pdf",
+    "PNG": "image/png",
+    "ZPL": "text/plain",
+}
+
+# Page layouts for batch printing: page size, outer margin and gap between labels (mm)
+LAYOUTS = {
+    "A4": {"page": (210, 297), "margin": 8, "gap": 3},
+    "Label roll": {"page": LABEL_SIZE_MM, "margin": 0, "gap": 0},
+}
+
+# Bump whenever a template's output changes so cached labels are redrawn
+TEMPLATE_VERSION = 1
+# Rendered labels kept in memory per process
+LABEL_CACHE_SIZE = 256
+# On-disk tier shared across restarts; None keeps the cache in memory only
+LABEL_CACHE_DIR = "label_cache"
+
+
+def mm_to_px(mm):
+    return int(mm / 25.4 * DPI)
+
+
+@lru_cache(maxsize=None)
+def _load_font(path, size):
+    try:
+        return ImageFont.truetype(path, size=size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+class LabelTemplate:
+    """A label template compiled for rendering.
+
+    Pixel geometry, fonts and the scaled logo are worked out once here, so
+    drawing a label only has to encode the QR code and place the text.
+    """
+
+    def __init__(self, spec, dpi=DPI):
+        self.dpi = dpi
+        self.width = int(spec["size_mm"][0] / 25.4 * dpi)
+        self.height = int(spec["size_mm"][1] / 25.4 * dpi)
+        width, height = self.width, self.height
+
+        self.split_x = int(width * spec["panel"])
+        self.qr_size = int(height * spec["qr"]["size"])
+        self.qr_pos = ((self.split_x - self.qr_size) // 2, int(height * spec["qr"]["top"]))
+
+        self.logo = None
+        logo_spec = spec["logo"]
+        try:
+            logo = Image.open(logo_spec["path"]).convert("RGBA")
+            logo_height = int(height * logo_spec["height"])
+            self.logo = logo.resize((int(logo.width / logo.height * logo_height), logo_height))
+            self.logo_pos = ((self.split_x - self.logo.width) // 2,
+                             self.qr_pos[1] + self.qr_size + int(height * logo_spec["gap"]))
+        except Exception as e:
+            print(f"⚠️ Logo not found: {e}")
+
+        name = spec["name"]
+        self.name_font = _load_font(*name["font"])
+        self.name_wrap = name["wrap"]
+        self.name_spacing = name["spacing"]
+        self.name_pos = (self.split_x + int(width * name["left"]), int(height * name["top"]))
+
+        number = spec["number"]
+        self.number_font = _load_font(*number["font"])
+        self.number_wrap = number["wrap"]
+        self.number_line_height = self.number_font.getbbox("Ay")[3] + number["line_gap"]
+        self.number_right = width - int(width * number["right"])
+        self.number_bottom = height - int(height * number["bottom"])
+
+        # Background with the black panel, copied for every label
+        self.background = Image.new("RGB", (width, height), "white")
+        ImageDraw.Draw(self.background).rectangle([0, 0, self.split_x, height], fill="black")
+        if self.logo is not None:
+            self.background.paste(self.logo, self.logo_pos, self.logo)
+
+    def render(self, nomor_asset, nama_asset):
+        """Draw one label and return it as an RGB PIL image."""
+        label = self.background.copy()
+        draw = ImageDraw.Draw(label)
+
+        qr = qrcode.QRCode(
+            version=None,
+            error_correction=qrcode.constants.ERROR_CORRECT_H,
+            box_size=10,
+            border=1,
+        )
+        qr.add_data(nomor_asset)
+        qr.make(fit=True)
+        qr_img = qr.make_image(fill_color="white", back_color="black").convert("RGB")
+        label.paste(qr_img.resize((self.qr_size, self.qr_size)), self.qr_pos)
+
+        wrapped = textwrap.fill(nama_asset.upper(), width=self.name_wrap)
+        draw.multiline_text(self.name_pos, wrapped, font=self.name_font,
+                            fill="black", spacing=self.name_spacing)
+
+        # Asset number wrapped and right-aligned in the bottom-right corner
+        wrapped_nomor = textwrap.wrap(nomor_asset, width=self.number_wrap)
+        start_y = self.number_bottom - len(wrapped_nomor) * self.number_line_height
+        for i, line in enumerate(wrapped_nomor):
+            line_width = draw.textlength(line, font=self.number_font)
+            draw.text((self.number_right - int(line_width), start_y + i * self.number_line_height),
+                      line, font=self.number_font, fill="black")
+
+        return label
+
+    def encode(self, label, fmt):
+        """Encode a rendered label as PDF, PNG or ZPL bytes."""
+        if fmt == "ZPL":
+            return to_zpl(label)
+        output = BytesIO()
+        if fmt == "PNG":
+            label.save(output, format="PNG", dpi=(self.dpi, self.dpi))
+        else:
+            label.save(output, format="PDF", resolution=float(self.dpi))
+        return output.getvalue()
+
+
+@lru_cache(maxsize=None)
+def get_template(name=DEFAULT_TEMPLATE):
+    """Return the compiled template, compiling it once per process."""
+    return LabelTemplate(TEMPLATES[name])
+
+
+def to_zpl(label):
+    """Convert a label image to a ZPL ^GFA bitmap for thermal printers."""
+    # 1-bit, black = 1 as ZPL expects
+    bitmap = label.convert("L").point(lambda value: 255 if value < 128 else 0, mode="1")
+    bytes_per_row = (bitmap.width + 7) // 8
+    data = bitmap.tobytes()
+    return (
+        f"^XA^PW{bitmap.width}^LL{bitmap.height}"
+        f"^FO0,0^GFA,{len(data)},{len(data)},{bytes_per_row},{data.hex().upper()}^FS^XZ\n"
+    ).encode()
+
+
+def render_label(nomor_asset, nama_asset):
+    """Draw one 60x40mm asset label at 300 DPI and return it as a PIL image."""
+    return get_template().render(nomor_asset, nama_asset)
+
+
+def generate_label(nomor_asset, nama_asset, fmt="PDF"):
+    """Single label as PDF, PNG or ZPL bytes in memory."""
+    template = get_template()
+    return BytesIO(template.encode(template.render(nomor_asset, nama_asset), fmt))
+
+
+class LabelCache:
+    """Size-bounded LRU of rendered labels, with an optional disk tier.
+
+    Keys are (nomor_asset, nama_asset, format, TEMPLATE_VERSION), so renaming
+    an asset or changing the template simply misses and renders a new label.
+    """
+
+    def __init__(self, max_items=LABEL_CACHE_SIZE, cache_dir=LABEL_CACHE_DIR):
+        self.max_items = max_items
+        self.cache_dir = cache_dir
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.{key[2].lower()}")
+
+    def _remember(self, key, label):
+        # Caller must hold the lock
+        self._items[key] = label
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                label = f.read()
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            self._remember(key, label)
+        return label
+
+    def put(self, key, label):
+        with self._lock:
+            self._remember(key, label)
+
+        if self.cache_dir:
+            path = self._path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(label)
+                os.replace(tmp_path, path)
+            except OSError as err:
+                print(f"Error: {err}")
+
+
+_label_cache = None
+_label_cache_lock = threading.Lock()
+
+
+def get_label_cache():
+    """Return the process-wide label cache."""
+    global _label_cache
+    with _label_cache_lock:
+        if _label_cache is None:
+            _label_cache = LabelCache()
+        return _label_cache
+
+
+def _label_key(nomor_asset, nama_asset, fmt):
+    return (str(nomor_asset), str(nama_asset), fmt, TEMPLATE_VERSION)
+
+
+def cached_label(nomor_asset, nama_asset, fmt="PDF"):
+    """Label bytes if it was rendered before, otherwise None (never renders)."""
+    return get_label_cache().get(_label_key(nomor_asset, nama_asset, fmt))
+
+
+def get_label(nomor_asset, nama_asset, fmt="PDF"):
+    """Label bytes in the given format, rendered only on a cache miss."""
+    key = _label_key(nomor_asset, nama_asset, fmt)
+    cache = get_label_cache()
+    label = cache.get(key)
+    if label is None:
+        label = generate_label(nomor_asset, nama_asset, fmt).getvalue()
+        cache.put(key, label)
+    return label
+
+
+def page_grid(layout):
+    """Return (columns, rows) of labels that fit on one page of the layout."""
+    spec = LAYOUTS[layout]
+    usable_w = spec["page"][0] - 2 * spec["margin"] + spec["gap"]
+    usable_h = spec["page"][1] - 2 * spec["margin"] + spec["gap"]
+    columns = max(1, int(usable_w // (LABEL_SIZE_MM[0] + spec["gap"])))
+    rows = max(1, int(usable_h // (LABEL_SIZE_MM[1] + spec["gap"])))
+    return columns, rows
+
+
+def render_page(layout, assets):
+    """Tile (nomor_asset, nama_asset) labels onto one page.
+
+    Runs in a worker process and returns (width, height, zlib data) of the
+    grayscale page, ready to be embedded in the PDF without re-encoding.
+    """
+    spec = LAYOUTS[layout]
+    columns, _ = page_grid(layout)
+    page = Image.new("L", (mm_to_px(spec["page"][0]), mm_to_px(spec["page"][1])), 255)
+    step_x = mm_to_px(LABEL_SIZE_MM[0] + spec["gap"])
+    step_y = mm_to_px(LABEL_SIZE_MM[1] + spec["gap"])
+    margin = mm_to_px(spec["margin"])
+
+    for i, (nomor_asset, nama_asset) in enumerate(assets):
+        row, column = divmod(i, columns)
+        label = render_label(nomor_asset, nama_asset).convert("L")
+        page.paste(label, (margin + column * step_x, margin + row * step_y))
+
+    return page.width, page.height, zlib.compress(page.tobytes(), 6)
+
+
+class PdfImageWriter:
+    """Minimal PDF writer that streams one full-page grayscale image per page.
+
+    Pages are written as they arrive, so a long batch never has to be held
+    in memory the way PIL's save_all does.
+    """
+
+    def __init__(self, fp, dpi=DPI):
+        self.fp = fp
+        self.dpi = dpi
+        self.offsets = {}
+        self.page_ids = []
+        # Objects 1 and 2 (catalog and page tree) are written by close()
+        self.next_id = 3
+        self.fp.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write_object(self, obj_id, header, stream=None):
+        self.offsets[obj_id] = self.fp.tell()
+        self.fp.write(b"%d 0 obj\n" % obj_id + header)
+        if stream is not None:
+            self.fp.write(b"\nstream\n" + stream + b"\nendstream")
+        self.fp.write(b"\nendobj\n")
+
+    def _new_id(self):
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def add_page(self, width, height, flate_data):
+        image_id, content_id, page_id = self._new_id(), self._new_id(), self._new_id()
+        page_w, page_h = width * 72 / self.dpi, height * 72 / self.dpi
+
+        self._write_object(image_id, (
+            b"<< /Type /XObject /Subtype /Image /Width %d /Height %d "
+            b"/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode /Length %d >>"
+            % (width, height, len(flate_data))
+        ), flate_data)
+
+        content = b"q %.2f 0 0 %.2f 0 0 cm /Im0 Do Q" % (page_w, page_h)
+        self._write_object(content_id, b"<< /Length %d >>" % len(content), content)
+
+        self._write_object(page_id, (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] "
+            b"/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>"
+            % (page_w, page_h, image_id, content_id)
+        ))
+        self.page_ids.append(page_id)
+
+    def close(self):
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.page_ids)
+        self._write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        self._write_object(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_ids)))
+
+        xref_at = self.fp.tell()
+        self.fp.write(b"xref\n0 %d\n" % self.next_id)
+        self.fp.write(b"0000000000 65535 f \n")
+        for obj_id in range(1, self.next_id):
+            self.fp.write(b"%010d 00000 n \n" % self.offsets[obj_id])
+        self.fp.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (self.next_id, xref_at))
+
+
+def generate_label_sheet(assets, layout="A4"):
+    """Render many labels into one multi-page PDF.
+
+    assets is a list of (nomor_asset, nama_asset). Pages are rendered in
+    parallel worker processes and streamed into the PDF in order.
+    """
+    columns, rows = page_grid(layout)
+    per_page = columns * rows
+    pages = [assets[i:i + per_page] for i in range(0, len(assets), per_page)]
+
+    output = BytesIO()
+    writer = PdfImageWriter(output)
+    if len(pages) == 1:
+        writer.add_page(*render_page(layout, pages[0]))
+    elif pages:
+        for page in get_process_pool().map(render_page, [layout] * len(pages), pages):
+            writer.add_page(*page)
+    writer.close()
+    output.seek(0)
+    return output
+
+
+def generate_label_zpl(assets):
+    """Render many labels as one ZPL job, one ^XA..^XZ block per label."""
+    template = get_template()
+    return b"".join(template.encode(template.render(nomor_asset, nama_asset), "ZPL")
+                    for nomor_asset, nama_asset in assets)
@@ -0,0 +1,25 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    """Return the process-wide pool for CPU-bound work (label pages, QR photos).
+
+    One pool per server process, so label rendering and photo decoding share
+    the cores instead of each starting a worker per core; spawn avoids forking
+    Streamlit's threads. Tasks must be module-level functions taking and
+    returning plain values.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 2,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
@@ -0,0 +1,113 @@
+import zipfile
+from io import BytesIO
+
+import cv2
+import numpy as np
+
+from helper.asset_index import normalize_asset_no
+from helper.process_pool import get_process_pool
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff")
+# Photos are decoded with their longer side scaled to FAST_SIDE; only when a
+# code is located but unreadable is the photo decoded again at up to FULL_SIDE
+FAST_SIDE = 1600
+FULL_SIDE = 3000
+
+
+def iter_images(files):
+    """(name, bytes) of every image in the uploaded files, opening ZIP archives."""
+    for upload in files:
+        name = upload.name
+        if name.lower().endswith(".zip"):
+            with zipfile.ZipFile(BytesIO(upload.getvalue())) as archive:
+                for entry in archive.infolist():
+                    entry_name = entry.filename
+                    if (entry.is_dir() or entry_name.startswith("__MACOSX/")
+                            or not entry_name.lower().endswith(IMAGE_EXTENSIONS)):
+                        continue
+                    yield f"{name}/{entry_name}", archive.read(entry)
+        elif name.lower().endswith(IMAGE_EXTENSIONS):
+            yield name, upload.getvalue()
+
+
+def _decode_at(detector, image, side):
+    scale = side / max(image.shape)
+    if scale < 1:
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    found, texts, _, _ = detector.detectAndDecodeMulti(image)
+    if not found:
+        return [], 0
+    decoded = [text for text in texts if text]
+    return decoded, len(texts) - len(decoded)
+
+
+def decode_image(content):
+    """Decode every QR code in one photo; returns (texts, unreadable, error).
+
+    unreadable counts codes that were located but could not be decoded.
+    Runs in a worker process, so it only takes and returns plain values.
+    """
+    image = cv2.imdecode(np.frombuffer(content, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        return [], 0, "not an image"
+
+    # The ArUco-based detector finds small, tilted labels the classic one misses
+    detector = cv2.QRCodeDetectorAruco()
+    try:
+        texts, unreadable = _decode_at(detector, image, FAST_SIDE)
+        if unreadable and max(image.shape) > FAST_SIDE:
+            full_texts, unreadable = _decode_at(detector, image, FULL_SIDE)
+            texts = list(dict.fromkeys(texts + full_texts))
+    except cv2.error as err:
+        return [], 0, str(err)
+    return texts, unreadable, None
+
+
+def _decode_in_worker(content):
+    # One image per process already uses every core; set in the workers only,
+    # as it is a process-wide OpenCV setting (the pool is shared, so per task)
+    cv2.setNumThreads(1)
+    return decode_image(content)
+
+
+def decode_images(images):
+    """Decode a list of (name, bytes) photos in parallel, keeping their order."""
+    if len(images) == 1:
+        return [decode_image(images[0][1])]
+    return list(get_process_pool().map(_decode_in_worker, [content for _, content in images]))
+
+
+def shelf_report(images, results, asset_index):
+    """Match decoded codes against the asset index.
+
+    Returns (per-image rows, assets): per image the recognized, unknown and
+    duplicate labels (already seen earlier in the upload); assets lists each
+    recognized asset once with the first image it appeared in.
+    """
+    per_image = []
+    assets = {}
+    for (name, _), (texts, unreadable, error) in zip(images, results):
+        recognized, unknown, duplicate = [], [], []
+        for text in texts:
+            record = asset_index.record(text)
+            if record is None:
+                unknown.append(text)
+                continue
+            key = normalize_asset_no(text)
+            if key in assets:
+                duplicate.append(record["Nomor Asset"])
+            else:
+                assets[key] = {"Nomor Asset": record["Nomor Asset"], "Nama Asset": record.get("Nama Asset"),
+                               "PENEMPATAN ASET": record.get("PENEMPATAN ASET"), "Foto": name}
+                recognized.append(record["Nomor Asset"])
+        per_image.append({
+            "Foto": name,
+            "Dikenali": len(recognized),
+            "Tidak Dikenal": len(unknown),
+            "Duplikat": len(duplicate),
+            "Tidak Terbaca": unreadable,
+            "Label": ", ".join(recognized),
+            "Kode Tidak Dikenal": ", ".join(unknown),
+            "Error": error or "",
+        })
+    return per_image, list(assets.values())
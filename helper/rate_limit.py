@@ -0,0 +1,36 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """Spaces calls evenly so no more than rate happen per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.time()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+# Below the Sheets quota of 60 write requests per minute per user; shared by
+# everything that writes with the same account (asset writer, history mirror)
+SHEETS_WRITES_PER_SECOND = 0.8
+
+_sheets_limiter = None
+_sheets_limiter_lock = threading.Lock()
+
+
+def sheets_write_limiter():
+    """Return the process-wide limiter for Sheets write requests."""
+    global _sheets_limiter
+    with _sheets_limiter_lock:
+        if _sheets_limiter is None:
+            _sheets_limiter = RateLimiter(SHEETS_WRITES_PER_SECOND)
+        return _sheets_limiter
@@ -0,0 +1,123 @@
+import hashlib
+
+from helper.asset_index import normalize_asset_no
+from helper.asset_schema import COLUMNS, build_frame, cell_text, column_letter
+
+LAST_COLUMN = column_letter(COLUMNS[-1])
+
+
+class RowConflict(Exception):
+    """The asset row changed (or was deleted) since the edit form was loaded."""
+
+    def __init__(self, asset_no, current):
+        self.asset_no = asset_no
+        self.current = current  # the row as it is now, None if it no longer exists
+        super().__init__(f"{asset_no} was changed by someone else" if current else f"{asset_no} no longer exists")
+
+
+def row_hash(record):
+    """Version of an asset row: a digest of its cells, blind to number formatting."""
+    cells = (cell_text(record.get(column)) or "" for column in COLUMNS)
+    return hashlib.md5("\x1f".join(cells).encode()).hexdigest()
+
+
+def _row_range(connection, sheet_row):
+    return f"{connection.sheet_name}!A{sheet_row}:{LAST_COLUMN}{sheet_row}"
+
+
+def _key_column(connection):
+    # Nomor Asset is column A; one narrow read finds where every asset is now
+    values = connection.fetch_ranges([f"{connection.sheet_name}!A:A"])[0]
+    rows = {}
+    for sheet_row, cells in enumerate(values[1:], start=2):
+        if cells and cells[0]:
+            rows.setdefault(normalize_asset_no(cells[0]), sheet_row)
+    return rows
+
+
+def current_rows(connection, assets):
+    """Locate assets in the sheet and read their rows as they are now.
+
+    assets is a list of (Nomor Asset, expected sheet row or None), the row
+    usually coming from the snapshot's asset index. Rows are read in one
+    batchGet; only if one has moved is column A read to find it again.
+    Returns {Nomor Asset: (sheet row, record)}, both None if it is gone.
+    """
+    located = {asset_no: hint for asset_no, hint in assets}
+    found = {}
+    for attempt in range(2):
+        pending = [asset_no for asset_no in located if asset_no not in found and located[asset_no]]
+        values = connection.fetch_ranges([_row_range(connection, located[asset_no]) for asset_no in pending]) if pending else []
+        for asset_no, rows in zip(pending, values):
+            row = rows[0] if rows else []
+            if row and normalize_asset_no(row[0]) == normalize_asset_no(asset_no):
+                found[asset_no] = (located[asset_no], build_frame(COLUMNS, [row]).iloc[0].to_dict())
+
+        missing = [asset_no for asset_no in located if asset_no not in found]
+        if not missing or attempt:
+            break
+        # Rows were inserted or deleted above: look the moved ones up by key and read again
+        key_rows = _key_column(connection)
+        located = {asset_no: key_rows.get(normalize_asset_no(asset_no)) for asset_no in missing}
+
+    return {asset_no: found.get(asset_no, (None, None)) for asset_no, _ in assets}
+
+
+def missing_rows(connection, rows):
+    """The new rows whose Nomor Asset (first cell) is not in the sheet yet."""
+    key_rows = _key_column(connection)
+    return [row for row in rows if normalize_asset_no(row[0]) not in key_rows]
+
+
+def checked_update(connection, updates):
+    """Write rows only where the sheet still matches the version the editor saw.
+
+    updates is a list of (Nomor Asset, expected row_hash, new row, sheet row
+    hint). Rows are found by key, so a row that moved is still the one
+    written. Returns one entry per update: None when written, or the
+    RowConflict to report.
+    """
+    current = current_rows(connection, [(asset_no, hint) for asset_no, _, _, hint in updates])
+
+    writes, outcomes = [], []
+    for asset_no, expected, row, _ in updates:
+        sheet_row, record = current[asset_no]
+        if record is None or row_hash(record) != expected:
+            outcomes.append(RowConflict(asset_no, record))
+        else:
+            writes.append((_row_range(connection, sheet_row), row))
+            outcomes.append(None)
+    if writes:
+        connection.update_rows(writes)
+    return outcomes
+
+
+def update_fields(connection, updates):
+    """Write some cells of asset rows, finding each row by Nomor Asset when written.
+
+    updates is a list of (Nomor Asset, {column: value}, sheet row hint).
+    Returns one entry per update: None when written, or a RowConflict if
+    the asset no longer exists.
+    """
+    current = current_rows(connection, [(asset_no, hint) for asset_no, _, hint in updates])
+
+    writes, outcomes = [], []
+    for asset_no, values, _ in updates:
+        sheet_row, _ = current[asset_no]
+        if sheet_row is None:
+            outcomes.append(RowConflict(asset_no, None))
+            continue
+        writes += [(f"{connection.sheet_name}!{column_letter(column)}{sheet_row}", [value])
+                   for column, value in values.items()]
+        outcomes.append(None)
+    if writes:
+        connection.update_rows(writes)
+    return outcomes
+
+
+def delete_assets(connection, asset_nos):
+    """Delete asset rows by Nomor Asset, looking up where they are at the moment of deletion."""
+    key_rows = _key_column(connection)
+    indexes = [key_rows[key] - 2 for key in map(normalize_asset_no, asset_nos) if key in key_rows]
+    if indexes:
+        connection.delete_rows(indexes)
@@ -0,0 +1,163 @@
+import threading
+import time
+
+import pandas as pd
+from googleapiclient.errors import HttpError
+
+from helper.google_clients import is_transient
+
+# Seconds a snapshot is served before it is refreshed
+DEFAULT_TTL = 600
+# Seconds to keep serving a stale snapshot after a failed reload before trying again
+RETRY_AFTER = 30
+
+
+class SheetSnapshot:
+    """Parsed contents of one sheet, shared read-only by every session."""
+
+    def __init__(self, data, version, loaded_at, changed_rows=None):
+        self.data = data
+        self.version = version
+        self.loaded_at = loaded_at
+        # Row positions that differ from the previous version, None if unknown
+        self.changed_rows = changed_rows
+        self._derived = {}
+        # Re-entrant so a builder can use other derived structures
+        self._derived_lock = threading.RLock()
+
+    def derived(self, name, builder):
+        """Return builder(self), building it only once per snapshot.
+
+        Used for indexes and other structures computed from the data, so
+        every session shares them until the next snapshot replaces this one.
+        """
+        with self._derived_lock:
+            if name not in self._derived:
+                self._derived[name] = builder(self)
+            return self._derived[name]
+
+
+class SheetCache:
+    """Process-wide cache holding one snapshot per spreadsheet/sheet.
+
+    Only one reload per key runs at a time; concurrent readers wait for it
+    and reuse its result. Once the TTL has passed the old snapshot is still
+    served while a background thread refreshes it, so page loads do not wait
+    on Google. After invalidate() the next reader reloads synchronously so
+    that a session sees its own writes.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._snapshots = {}
+        self._expires_at = {}
+        self._invalidated = set()
+        # Bumped by every invalidate(), to tell whether a load started before the latest write
+        self._generations = {}
+
+    def _is_fresh(self, key):
+        return key in self._snapshots and time.time() < self._expires_at.get(key, 0)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _reload(self, key, loader, ttl):
+        # Caller must hold the key lock
+        previous = self._snapshots.get(key)
+        generation = self._generations.get(key, 0)
+        try:
+            data, changed_rows = loader()
+        except Exception as err:
+            # Google refusing or unreachable (network, timeout, token refresh)
+            if not isinstance(err, HttpError) and not is_transient(err):
+                raise
+            print(f"Error: {err}")
+            if previous is None:
+                return SheetSnapshot(pd.DataFrame(), 0, time.time())
+            # Keep serving the last good copy instead of an empty sheet
+            self._expires_at[key] = time.time() + RETRY_AFTER
+            return previous
+
+        if self._generations.get(key, 0) == generation:
+            self._invalidated.discard(key)
+            self._expires_at[key] = time.time() + (self.ttl if ttl is None else ttl)
+        # Otherwise a write was invalidated while this load ran; the data may predate it,
+        # so the key stays invalidated and the next reader loads again
+        if previous is not None and data is previous.data:
+            # Nothing changed upstream, keep the snapshot and its version
+            return previous
+
+        version = previous.version + 1 if previous else 1
+        snapshot = SheetSnapshot(data, version, time.time(), changed_rows)
+        self._snapshots[key] = snapshot
+        return snapshot
+
+    def _refresh_in_background(self, key, loader, ttl):
+        key_lock = self._key_lock(key)
+        if not key_lock.acquire(blocking=False):
+            return  # a reload is already running
+
+        def run():
+            try:
+                self._reload(key, loader, ttl)
+            finally:
+                key_lock.release()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def get(self, key, loader, ttl=None, seed=None):
+        if self._is_fresh(key):
+            return self._snapshots[key]
+
+        previous = self._snapshots.get(key)
+        if previous is not None and key not in self._invalidated:
+            self._refresh_in_background(key, loader, ttl)
+            return previous
+
+        with self._key_lock(key):
+            # Another session may have reloaded while we were waiting
+            if self._is_fresh(key):
+                return self._snapshots[key]
+
+            if key not in self._snapshots and seed is not None:
+                data = seed()
+                if data is not None:
+                    # Serve the local copy now, the refresh below brings it up to date
+                    self._snapshots[key] = SheetSnapshot(data, 0, time.time())
+                    self._expires_at[key] = 0
+
+            if key in self._snapshots and key not in self._invalidated:
+                snapshot = self._snapshots[key]
+            else:
+                return self._reload(key, loader, ttl)
+
+        self._refresh_in_background(key, loader, ttl)
+        return snapshot
+
+    def invalidate(self, key):
+        # Keep the snapshot around so it can still be served if the reload fails
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+        self._expires_at[key] = 0
+        self._invalidated.add(key)
+
+
+_cache = SheetCache()
+
+
+def get_snapshot(spreadsheet_id, sheet_name, loader, ttl=None, seed=None):
+    """Return the shared snapshot of a sheet, calling loader() only when it expired.
+
+    loader() returns (data, changed_rows); returning the previous data object
+    means the sheet is unchanged and only extends the snapshot's lifetime.
+    seed() may return a locally stored DataFrame to serve on a cold start.
+    """
+    return _cache.get((spreadsheet_id, sheet_name), loader, ttl, seed)
+
+
+def invalidate_snapshot(spreadsheet_id, sheet_name):
+    """Force the next get_snapshot() call to reload, e.g. after a write."""
+    _cache.invalidate((spreadsheet_id, sheet_name))
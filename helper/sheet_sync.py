@@ -0,0 +1,110 @@
+import threading
+
+import pandas as pd
+from googleapiclient.errors import HttpError
+
+from helper.asset_schema import concat_frames
+from helper.gsheet_connection import parse_values
+
+# Rows per block; a block is only re-parsed when its content hash changes
+BLOCK_SIZE = 200
+
+
+class SheetMirror:
+    """Local mirror of one sheet that is refreshed incrementally.
+
+    sync() first compares the spreadsheet's Drive version with the one seen
+    last time and skips the download when nothing was edited. When the sheet
+    did change, the raw values are hashed in blocks of BLOCK_SIZE rows and only
+    the blocks whose hash differs are parsed again and patched into the mirror.
+    """
+
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self.revision = None
+        self.use_revision = True
+        self.header = None
+        self.block_hashes = []
+        self.blocks = []
+        self.data = None
+
+    def _read_revision(self, gsheet):
+        if not self.use_revision:
+            return None
+        try:
+            return gsheet.get_revision()
+        except HttpError as err:
+            # Token without a Drive scope: stop asking and always diff the values
+            if err.resp.status in (401, 403, 404):
+                self.use_revision = False
+            print(f"Error: {err}")
+            return None
+
+    def sync(self, gsheet):
+        """Bring the mirror up to date.
+
+        Returns (data, changed_rows). data is the same object as before when
+        nothing changed; changed_rows lists the row positions that were
+        re-parsed, or is None when the whole sheet was rebuilt.
+        """
+        revision = self._read_revision(gsheet)
+        if revision is not None and revision == self.revision and self.data is not None:
+            return self.data, []
+
+        values = gsheet.fetch_values()
+        if not values:
+            self.revision = revision
+            self.header = None
+            self.block_hashes = []
+            self.blocks = []
+            self.data = pd.DataFrame()
+            return self.data, None
+
+        header, rows = values[0], values[1:]
+        full_rebuild = header != self.header
+
+        hashes = []
+        blocks = []
+        changed_rows = []
+        for block_no, start in enumerate(range(0, len(rows), self.block_size)):
+            block_rows = rows[start:start + self.block_size]
+            block_hash = hash(tuple(tuple(row) for row in block_rows))
+            hashes.append(block_hash)
+
+            if (not full_rebuild
+                    and block_no < len(self.block_hashes)
+                    and self.block_hashes[block_no] == block_hash):
+                blocks.append(self.blocks[block_no])
+                continue
+
+            blocks.append(parse_values([header] + block_rows))
+            changed_rows.extend(range(start, start + len(block_rows)))
+
+        if not full_rebuild and hashes == self.block_hashes:
+            # Edited outside the data rows (e.g. another tab); keep the old frame
+            self.revision = revision
+            return self.data, []
+
+        self.revision = revision
+        self.header = header
+        self.block_hashes = hashes
+        self.blocks = blocks
+        if blocks:
+            self.data = concat_frames(blocks)
+        else:
+            self.data = parse_values([header])
+
+        return self.data, None if full_rebuild else changed_rows
+
+
+_mirrors = {}
+_mirrors_lock = threading.Lock()
+
+
+def get_mirror(spreadsheet_id, sheet_name):
+    """Return the process-wide mirror for a spreadsheet/sheet."""
+    with _mirrors_lock:
+        key = (spreadsheet_id, sheet_name)
+        if key not in _mirrors:
+            _mirrors[key] = SheetMirror()
+        return _mirrors[key]
@@ -0,0 +1,312 @@
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from googleapiclient.errors import HttpError
+
+from helper.asset_schema import cell_text
+from helper.audit_log import get_audit_log
+from helper.google_clients import is_transient
+from helper.gsheet_connection import GsheetConnection
+from helper.rate_limit import RateLimiter, sheets_write_limiter
+from helper.row_version import checked_update, delete_assets, missing_rows, update_fields
+from helper.sheet_cache import invalidate_snapshot
+from helper.write_queue import WriteQueue
+
+# Flush once this many operations are waiting...
+MAX_BATCH = 500
+# ...or once the oldest one has waited this many seconds
+FLUSH_INTERVAL = 2.0
+# Transient errors (see helper.google_clients.is_transient) are retried with exponential backoff
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+# Still failing after that: Google or the network is down, so the queue
+# pauses (doubling up to the maximum) and keeps everything for later
+OUTAGE_PAUSE = 30
+MAX_OUTAGE_PAUSE = 300
+
+
+def _as_text(record):
+    # Audit entries are stored as cell text, the form the audit log compares anyway
+    return None if record is None else {field: cell_text(value) for field, value in record.items()}
+
+
+class SheetWriter:
+    """Durable write-behind queue that sends sheet mutations in batches.
+
+    append(), update(), update_checked(), update_fields() and delete() store the operation
+    in a local SQLite queue and return at once with a Future that resolves
+    once it has been written (or fails for good). A background thread
+    flushes when MAX_BATCH operations are queued or the oldest has waited
+    FLUSH_INTERVAL seconds; flush() sends right away. Consecutive operations
+    of the same kind go out as one request, so a batch of 500 appends costs
+    a single API call, and requests are spaced to stay within the quota.
+
+    When Google stays unavailable the queue pauses and keeps its order;
+    nothing is dropped, and operations left over from a previous run are
+    sent when the server starts again.
+    """
+
+    def __init__(self, connection_factory, on_flush=None, on_written=None, queue_name="default",
+                 max_batch=MAX_BATCH, flush_interval=FLUSH_INTERVAL, rate=None):
+        self._connection_factory = connection_factory
+        self._connection = None
+        self._on_flush = on_flush
+        self._on_written = on_written
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue = WriteQueue(queue_name)
+        # The quota is per account, so by default every writer shares one limiter
+        self._limiter = RateLimiter(rate) if rate else sheets_write_limiter()
+        self._futures = {}
+        self._cond = threading.Condition()
+        # Left over from a previous run: due right away
+        self._pending = self._queue.counts()["pending"]
+        self._first_queued_at = time.time() - flush_interval if self._pending else None
+        self._flush_requested = False
+        self._retry_at = 0.0
+        self._outage_pause = OUTAGE_PAUSE
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _submit(self, kind, payload, audit):
+        future = Future()
+        if audit is not None:
+            asset_no, before, after, action, editor = audit
+            audit = (str(asset_no), _as_text(before), _as_text(after), action, editor)
+        # On disk before the caller moves on
+        op_id = self._queue.put(kind, payload, audit)
+        future.op_id = op_id
+        with self._cond:
+            if not self._pending:
+                self._first_queued_at = time.time()
+            self._pending += 1
+            self._futures[op_id] = future
+            self._cond.notify()
+        return future
+
+    # audit is an optional (Nomor Asset, before, after, action, editor) entry,
+    # handed to on_written once the operation has actually reached the sheet
+
+    def append(self, row, audit=None):
+        """Queue a new row at the end of the sheet."""
+        return self._submit("append", row, audit)
+
+    def update(self, update_range, row, audit=None):
+        """Queue an overwrite of update_range (A1 notation) with row."""
+        return self._submit("update", (update_range, row), audit)
+
+    def update_checked(self, asset_no, expected_hash, row, sheet_row=None, audit=None):
+        """Queue an overwrite of an asset's row that only happens if the row still has expected_hash.
+
+        The row is found by Nomor Asset when the batch is sent (sheet_row is a
+        hint); on a mismatch the Future fails with RowConflict.
+        """
+        return self._submit("checked", (asset_no, expected_hash, row, sheet_row), audit)
+
+    def update_fields(self, asset_no, values, sheet_row=None, audit=None):
+        """Queue a write of some cells ({column: value}) of an asset's row.
+
+        The row is found by Nomor Asset when the batch is sent (sheet_row is a
+        hint); if the asset is gone the Future fails with RowConflict.
+        """
+        return self._submit("fields", (asset_no, values, sheet_row), audit)
+
+    def delete(self, asset_no, audit=None):
+        """Queue deletion of an asset's row, found by Nomor Asset when the batch is sent."""
+        return self._submit("delete", asset_no, audit)
+
+    def flush(self):
+        """Send everything queued so far without waiting for the batch to fill up."""
+        with self._cond:
+            self._flush_requested = True
+            self._retry_at = 0.0
+            self._cond.notify()
+
+    def forget(self, future):
+        """Stop waiting for an operation's Future.
+
+        The operation is still sent; if it then conflicts, nobody is told,
+        so it is kept in the queue as failed instead.
+        """
+        with self._cond:
+            self._futures.pop(future.op_id, None)
+
+    def status(self):
+        """Counts for the UI: operations still queued and operations that failed."""
+        counts = self._queue.counts()
+        counts["paused"] = time.time() < self._retry_at
+        return counts
+
+    def retry_failed(self):
+        """Queue the failed operations again."""
+        retried = self._queue.retry_failed()
+        with self._cond:
+            if retried and not self._pending:
+                self._first_queued_at = time.time()
+            self._pending += retried
+            self._cond.notify()
+        return retried
+
+    def discard_failed(self):
+        return self._queue.discard_failed()
+
+    def failed(self):
+        return self._queue.failed()
+
+    def _due(self):
+        if not self._pending or time.time() < self._retry_at:
+            return False
+        return (self._flush_requested
+                or self._pending >= self.max_batch
+                or time.time() - self._first_queued_at >= self.flush_interval)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._due():
+                    if self._pending:
+                        due_at = max(self._first_queued_at + self.flush_interval, self._retry_at)
+                        self._cond.wait(max(due_at - time.time(), 0.01))
+                    else:
+                        self._cond.wait()
+                self._flush_requested = False
+
+            batch = self._queue.peek(self.max_batch)
+            if not batch:
+                with self._cond:
+                    self._pending = 0
+                continue
+            finished = self._write(batch)
+
+            with self._cond:
+                self._pending = max(0, self._pending - finished)
+                self._first_queued_at = time.time() if self._pending else None
+                # Whatever is left from a partial or full batch goes out on the next pass
+                self._flush_requested = self._pending > 0 and finished == len(batch)
+
+    def _write(self, batch):
+        """Send a batch in order; returns how many operations left the queue."""
+        # Group consecutive operations of the same kind, keeping their order
+        groups = []
+        for op_id, kind, payload in batch:
+            if groups and groups[-1][0] == kind:
+                groups[-1][1].append((op_id, payload))
+            else:
+                groups.append((kind, [(op_id, payload)]))
+
+        results = []
+        try:
+            for kind, items in groups:
+                results.extend(self._send(kind, items))
+            self._outage_pause = OUTAGE_PAUSE
+        except Exception as err:
+            # Keep the rest of the batch, in order, for when Google is back
+            print(f"Error: {err}")
+            with self._cond:
+                self._retry_at = time.time() + self._outage_pause
+            self._outage_pause = min(self._outage_pause * 2, MAX_OUTAGE_PAUSE)
+
+        if self._on_flush is not None and results:
+            self._on_flush()
+
+        # Resolve after on_flush so callers that wait already see fresh data
+        finished = 0
+        for ids, outcomes in results:
+            finished += len(ids)
+            for op_id, outcome in zip(ids, outcomes):
+                with self._cond:
+                    future = self._futures.pop(op_id, None)
+                if future is None:
+                    continue  # queued by an earlier run of the server
+                if outcome is None:
+                    future.set_result(True)
+                else:
+                    future.set_exception(outcome)
+        return finished
+
+    def _send(self, kind, items):
+        """Write a group; returns [(ids, outcomes)] and raises only transient errors."""
+        ids = [op_id for op_id, _ in items]
+        try:
+            # Checked and field updates report a conflict per item; everything else succeeds as a group
+            outcomes = self._with_retries(kind, [payload for _, payload in items], ids) or [None] * len(items)
+        except Exception as err:
+            if is_transient(err):
+                raise
+            print(f"Error: {err}")
+            if len(items) > 1:
+                # Google rejects the whole request; send one by one so only the bad ones fail
+                return [result for item in items for result in self._send(kind, [item])]
+            self._queue.fail(ids, err)
+            return [(ids, [err])]
+        # A conflict is reported through the Future when a caller is waiting on it; otherwise
+        # it stays in the queue as failed, so it is not lost
+        for op_id, outcome in zip(ids, outcomes):
+            if outcome is None:
+                continue
+            with self._cond:
+                waiting = op_id in self._futures
+            if waiting:
+                self._queue.done([op_id])
+            else:
+                self._queue.fail([op_id], outcome)
+        audits = self._queue.done([op_id for op_id, outcome in zip(ids, outcomes) if outcome is None])
+        if audits and self._on_written is not None:
+            self._on_written(audits)
+        return [(ids, outcomes)]
+
+    def _with_retries(self, kind, payloads, ids):
+        # Appends are not idempotent: one sent before (a retry, or a batch that timed out
+        # before an outage or restart) may already be in the sheet
+        resent = kind == "append" and self._queue.was_sent(ids)
+        for attempt in range(MAX_RETRIES + 1):
+            self._limiter.wait()
+            try:
+                if self._connection is None:
+                    self._connection = self._connection_factory()
+                if kind == "append":
+                    rows = missing_rows(self._connection, payloads) if resent else payloads
+                    self._queue.mark_sent(ids)
+                    resent = True
+                    if rows:
+                        self._connection.append_rows(rows)
+                elif kind == "update":
+                    self._connection.update_rows(payloads)
+                elif kind == "checked":
+                    return checked_update(self._connection, payloads)
+                elif kind == "fields":
+                    return update_fields(self._connection, payloads)
+                else:
+                    delete_assets(self._connection, payloads)
+                return
+            except Exception as err:
+                if not is_transient(err) or attempt == MAX_RETRIES:
+                    raise
+                if not isinstance(err, HttpError):
+                    # Rebuild the client after a network failure
+                    self._connection = None
+            time.sleep(BACKOFF_BASE * 2 ** attempt + random.uniform(0, 1))
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(token_json, scopes, spreadsheet_id, sheet_name):
+    """Return the process-wide writer for a sheet.
+
+    Each flush invalidates the shared snapshot so the next read sees the writes,
+    and the audit entries of written operations go to the audit log.
+    """
+    with _writers_lock:
+        key = (spreadsheet_id, sheet_name)
+        if key not in _writers:
+            _writers[key] = SheetWriter(
+                lambda: GsheetConnection(token_json, scopes, spreadsheet_id, sheet_name),
+                on_flush=lambda: invalidate_snapshot(spreadsheet_id, sheet_name),
+                on_written=lambda audits: get_audit_log().record_many(audits),
+                queue_name=f"{spreadsheet_id}/{sheet_name}",
+            )
+        return _writers[key]
@@ -0,0 +1,82 @@
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from helper.asset_index import normalize_asset_no
+from helper.filter_engine import get_filter_engine
+
+# Status written for assets found and not found during a stock take
+FOUND_STATUS = "Available"
+MISSING_STATUS = "Missing"
+
+
+class StockTake:
+    """One stock-take session: the assets scanned at a placement.
+
+    Scans are resolved through the snapshot's asset index and remembered
+    once each, with the time and location they were seen, so the scanner
+    can keep running and the same label scanned twice is not counted twice.
+    """
+
+    def __init__(self, location):
+        self.location = location
+        self.started_at = datetime.now()
+        self.seen = OrderedDict()   # normalized Nomor Asset -> {"Nomor Asset", "Waktu", "Lokasi"}
+        self.unknown = OrderedDict()  # codes matching no asset -> time first scanned
+
+    def scan(self, code, asset_index):
+        """Record a decoded code; returns ("new" | "duplicate" | "unknown", record or None)."""
+        key = normalize_asset_no(code)
+        record = asset_index.record(code)
+        if record is None:
+            self.unknown.setdefault(key, datetime.now())
+            return "unknown", None
+        if key in self.seen:
+            return "duplicate", record
+        self.seen[key] = {"Nomor Asset": record["Nomor Asset"], "Waktu": datetime.now(), "Lokasi": self.location}
+        return "new", record
+
+    def expected_positions(self, snapshot):
+        # Memoized per snapshot by the filter engine
+        return get_filter_engine(snapshot).positions(categories={"PENEMPATAN ASET": [self.location]})
+
+    def tally(self, snapshot, asset_index):
+        """Row positions of the found, missing and unexpected assets."""
+        expected = self.expected_positions(snapshot)
+        seen = np.array([position for position in map(asset_index.position, self.seen) if position is not None], dtype=int)
+        is_expected = np.isin(seen, expected)
+        return {
+            "found": seen[is_expected],
+            "missing": np.setdiff1d(expected, seen),
+            "unexpected": seen[~is_expected],
+        }
+
+    def changes(self, snapshot, asset_index, move_unexpected=False):
+        """(row position, column, old value, new value) of every cell the result changes."""
+        data = snapshot.data
+        tally = self.tally(snapshot, asset_index)
+
+        changes = []
+        for kind, status in (("found", FOUND_STATUS), ("unexpected", FOUND_STATUS), ("missing", MISSING_STATUS)):
+            for position in tally[kind]:
+                row = data.iloc[position]
+                if row.get("Status") != status:
+                    changes.append((position, "Status", row.get("Status"), status))
+                if kind == "unexpected" and move_unexpected:
+                    changes.append((position, "PENEMPATAN ASET", row.get("PENEMPATAN ASET"), self.location))
+        return changes
+
+
+def asset_updates(changes, data):
+    """Changes as returned by StockTake.changes(), grouped per asset.
+
+    Returns (Nomor Asset, row position, {column: old}, {column: new}); the
+    writer finds the row by Nomor Asset, the position is only a hint.
+    """
+    grouped = OrderedDict()
+    for position, column, old, new in changes:
+        _, before, after = grouped.setdefault(position, (position, {}, {}))
+        before[column], after[column] = old, new
+    return [(data["Nomor Asset"].iloc[position], position, before, after)
+            for position, before, after in grouped.values()]
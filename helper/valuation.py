@@ -0,0 +1,119 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
+
+from helper.depreciation import month_label
+
+# Columns the report can be grouped by
+GROUP_COLUMNS = ["Kepemilikan", "Kelompok Aset", "PENEMPATAN ASET"]
+# Asset columns carried into the per-asset report
+REPORT_COLUMNS = ["Nomor Asset", "Nama Asset"] + GROUP_COLUMNS + [
+    "Tahun Beli", "Bulan Beli", "Harga Perolehan", "Nilai Penyusutan per Bulan",
+]
+# Rows written per step when exporting
+EXPORT_CHUNK_SIZE = 5000
+# Shown with thousands separators in the XLSX export
+MONEY_COLUMNS = ["Harga Perolehan", "Nilai Penyusutan per Bulan", "Nilai Buku", "Akumulasi Penyusutan"]
+EXPORT_FORMATS = {
+    "XLSX": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "CSV": "text/csv",
+    "Parquet": "application/octet-stream",
+}
+
+
+def asset_valuation(data, engine, positions, as_of):
+    """Per-asset book value and accumulated depreciation as of a month index.
+
+    Assets bought after that month are left out.
+    """
+    positions = np.asarray(positions, dtype=int)
+    positions = positions[engine.owned_at([as_of])[positions, 0]]
+    columns = [column for column in REPORT_COLUMNS if column in data.columns]
+    report = data.iloc[positions][columns].reset_index(drop=True)
+    book_value = engine.book_value_at([as_of])[positions, 0]
+    report["Nilai Buku"] = book_value
+    report["Akumulasi Penyusutan"] = report["Harga Perolehan"].fillna(0).to_numpy() - book_value
+    return report
+
+
+def valuation_summary(report, group_by):
+    """Totals of the per-asset report for each combination of the group columns."""
+    totals = {"Jumlah Aset": ("Nomor Asset", "size"),
+              "Harga Perolehan": ("Harga Perolehan", "sum"),
+              "Akumulasi Penyusutan": ("Akumulasi Penyusutan", "sum"),
+              "Nilai Buku": ("Nilai Buku", "sum")}
+    if not group_by:
+        report = report.assign(Total="Semua Aset")
+        group_by = ["Total"]
+    return report.groupby(group_by, observed=True, dropna=False).agg(**totals).reset_index()
+
+
+def valuation_forecast(data, engine, positions, start, months, group_by=None):
+    """Total book value for each month from start, optionally split by one group column.
+
+    Returns one row per month with a "Bulan" label, plus one column per group
+    (or a single "Nilai Buku" column).
+    """
+    positions = np.asarray(positions, dtype=int)
+    month_indexes = np.arange(start, start + months)
+    # (assets, months) matrix in one broadcast
+    values = engine.book_value_at(month_indexes)[positions]
+
+    if group_by:
+        groups = data[group_by].iloc[positions].astype(str).to_numpy()
+        forecast = pd.DataFrame(values.T, columns=groups).T.groupby(level=0).sum().T
+    else:
+        forecast = pd.DataFrame({"Nilai Buku": values.sum(axis=0)})
+    forecast.insert(0, "Bulan", [month_label(index) for index in month_indexes])
+    return forecast
+
+
+def export_report(report, fmt, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write the report as XLSX, CSV or Parquet, chunk by chunk, and return the bytes.
+
+    Rows are written in chunks so no second full copy of the report (a list
+    of rows, a whole workbook in memory, one big Arrow table) is ever built.
+    """
+    output = io.BytesIO()
+    chunks = (report.iloc[start:start + chunk_size] for start in range(0, len(report), chunk_size))
+
+    if fmt == "XLSX":
+        # constant_memory flushes every row to a temp file as soon as it is complete
+        workbook = xlsxwriter.Workbook(output, {"constant_memory": True, "in_memory": False})
+        sheet = workbook.add_worksheet("Valuasi")
+        money = workbook.add_format({"num_format": "#,##0"})
+        sheet.write_row(0, 0, list(report.columns))
+        # One typed writer per column; generic write() dispatch is several times slower
+        numeric = [pd.api.types.is_numeric_dtype(report[column]) for column in report.columns]
+        for i, column in enumerate(report.columns):
+            if column in MONEY_COLUMNS:
+                sheet.set_column(i, i, 18, money)
+        row_number = 1
+        for chunk in chunks:
+            for row in chunk.itertuples(index=False, name=None):
+                for column, value in enumerate(row):
+                    if value is None or value is pd.NA or value != value:
+                        continue  # leave empty cells blank
+                    if numeric[column]:
+                        sheet.write_number(row_number, column, value)
+                    else:
+                        sheet.write_string(row_number, column, str(value))
+                row_number += 1
+        workbook.close()
+    elif fmt == "Parquet":
+        schema = pa.Schema.from_pandas(report.iloc[:0], preserve_index=False)
+        with pq.ParquetWriter(output, schema) as parquet:
+            for chunk in chunks:
+                parquet.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    else:
+        text = io.TextIOWrapper(output, encoding="utf-8-sig", newline="", write_through=True)
+        report.iloc[:0].to_csv(text, index=False)
+        for chunk in chunks:
+            chunk.to_csv(text, header=False, index=False)
+        text.detach()
+
+    return output.getvalue()
@@ -0,0 +1,134 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+WRITE_QUEUE_DB = os.path.join("data_store", "write_queue.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    queue TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    created REAL NOT NULL,
+    error TEXT,
+    audit TEXT,
+    sent INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS operations_queue_status ON operations (queue, status, id);
+"""
+
+
+def _plain(value):
+    # NumPy scalars (from parsed frames) are stored as the Python value they hold
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+class WriteQueue:
+    """Durable FIFO of sheet operations, stored in SQLite.
+
+    An operation is committed to disk before the caller gets its Future, and
+    stays "pending" until it has been written to the sheet, so a crash,
+    restart or Google outage never loses it. Operations that Google rejects
+    for good are kept as "failed" until retried or discarded.
+    """
+
+    def __init__(self, name, path=WRITE_QUEUE_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.name = name
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(path, check_same_thread=False)
+        # WAL keeps enqueueing from page threads cheap while the worker reads
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.executescript(_SCHEMA)
+        # Queues created before audit entries and send attempts were stored with the operations
+        columns = [row[1] for row in self._con.execute("PRAGMA table_info(operations)")]
+        if "audit" not in columns:
+            self._con.execute("ALTER TABLE operations ADD COLUMN audit TEXT")
+        if "sent" not in columns:
+            self._con.execute("ALTER TABLE operations ADD COLUMN sent INTEGER NOT NULL DEFAULT 0")
+
+    def put(self, kind, payload, audit=None):
+        """Store an operation, with the audit entry to log once it is written; returns its id."""
+        with self._lock, self._con:
+            cursor = self._con.execute(
+                "INSERT INTO operations (queue, kind, payload, created, audit) VALUES (?, ?, ?, ?, ?)",
+                (self.name, kind, json.dumps(payload, default=_plain), time.time(),
+                 None if audit is None else json.dumps(audit, default=_plain)),
+            )
+            return cursor.lastrowid
+
+    def peek(self, limit):
+        """Oldest pending operations as (id, kind, payload), without removing them."""
+        with self._lock:
+            rows = self._con.execute(
+                "SELECT id, kind, payload FROM operations WHERE queue = ? AND status = 'pending' ORDER BY id LIMIT ?",
+                (self.name, limit),
+            ).fetchall()
+        return [(op_id, kind, json.loads(payload)) for op_id, kind, payload in rows]
+
+    def mark_sent(self, ids):
+        """Remember that operations were sent once, even if no answer came back."""
+        with self._lock, self._con:
+            self._con.executemany("UPDATE operations SET sent = 1 WHERE id = ?", [(op_id,) for op_id in ids])
+
+    def was_sent(self, ids):
+        """Whether any of the operations was sent before (by this run or an earlier one)."""
+        with self._lock:
+            return any(self._con.execute("SELECT sent FROM operations WHERE id = ?", (op_id,)).fetchone() == (1,)
+                       for op_id in ids)
+
+    def done(self, ids):
+        """Remove written operations; returns their audit entries."""
+        with self._lock, self._con:
+            audits = []
+            for op_id in ids:
+                row = self._con.execute("SELECT audit FROM operations WHERE id = ?", (op_id,)).fetchone()
+                if row and row[0]:
+                    audits.append(json.loads(row[0]))
+            self._con.executemany("DELETE FROM operations WHERE id = ?", [(op_id,) for op_id in ids])
+        return audits
+
+    def fail(self, ids, error):
+        with self._lock, self._con:
+            self._con.executemany(
+                "UPDATE operations SET status = 'failed', error = ? WHERE id = ?",
+                [(str(error), op_id) for op_id in ids],
+            )
+
+    def retry_failed(self):
+        """Put every failed operation back in line; returns how many."""
+        with self._lock, self._con:
+            return self._con.execute(
+                "UPDATE operations SET status = 'pending', error = NULL WHERE queue = ? AND status = 'failed'",
+                (self.name,),
+            ).rowcount
+
+    def discard_failed(self):
+        with self._lock, self._con:
+            return self._con.execute(
+                "DELETE FROM operations WHERE queue = ? AND status = 'failed'", (self.name,)
+            ).rowcount
+
+    def failed(self, limit=100):
+        """Failed operations as (id, kind, payload, error), oldest first."""
+        with self._lock:
+            rows = self._con.execute(
+                "SELECT id, kind, payload, error FROM operations WHERE queue = ? AND status = 'failed' ORDER BY id LIMIT ?",
+                (self.name, limit),
+            ).fetchall()
+        return [(op_id, kind, json.loads(payload), error) for op_id, kind, payload, error in rows]
+
+    def counts(self):
+        """{"pending": n, "failed": n} for this queue."""
+        with self._lock:
+            rows = self._con.execute(
+                "SELECT status, COUNT(*) FROM operations WHERE queue = ? GROUP BY status", (self.name,)
+            ).fetchall()
+        counts = {"pending": 0, "failed": 0}
+        counts.update(dict(rows))
+        return counts
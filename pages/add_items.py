@@ -1,10 +1,11 @@
 import streamlit as st
-from PIL import Image, ImageDraw, ImageFont
-import qrcode
-from io import BytesIO
 import pandas as pd
-from helper.gsheet_connection import GsheetConnection  
-import textwrap
+from helper.sheet_writer import get_writer
+from helper.labels import get_label
+from helper.asset_schema import (
+    SUMBER_OPTIONS, KELOMPOK_OPTIONS, KEPEMILIKAN_OPTIONS, BULAN_OPTIONS,
+    COLUMNS, PERSENTASE_PENYUSUTAN_OPTIONS, STATUS_OPTIONS, new_asset_row,
+)
 
 
 # Configuration
@@ -13,89 +14,26 @@ SCOPES = st.secrets["gsheet_auth"]["SCOPES"]
 SPREADSHEET_ID = st.secrets["gsheet_auth"]["SPREADSHEET_ID"]
 SHEET_NAME = st.secrets["gsheet_auth"]["SHEET_NAME"]
 
-# Initialize Google Sheets Connection
-gsheet = GsheetConnection(TOKEN_JSON, SCOPES, SPREADSHEET_ID, SHEET_NAME)
-
-from PIL import Image, ImageDraw, ImageFont
-import qrcode
-from io import BytesIO
-
-def generate_label(nomor_asset, kepemilikan, nama_asset):
-    # Define label size (60mm x 40mm in pixels at 96 DPI)
-    label_width, label_height = 227, 151  
-
-    # Create blank label (white background)
-    label = Image.new("RGB", (label_width, label_height), "white")
-    draw = ImageDraw.Draw(label)
-
-    # Generate QR Code
-    qr = qrcode.QRCode(box_size=3, border=2)
-    qr.add_data(nomor_asset)
-    qr.make(fit=True)
-    qr_img = qr.make_image(fill="black", back_color="white")
-
-    # Resize QR Code to fit within the label
-    qr_size = 90  
-    qr_img = qr_img.resize((qr_size, qr_size))
-
-    # Load a font
-    try:
-        font = ImageFont.truetype("arial.ttf", 14)  
-    except IOError:
-        font = ImageFont.load_default()
-
-    # Position QR Code (left side)
-    qr_x = 5
-    qr_y = (label_height - qr_size) // 2
-    label.paste(qr_img, (qr_x, qr_y))
-
-    # Text positions (right of QR Code)
-    text_x = qr_x + qr_size + 5  
-    text_y = qr_y + 7
-
-    # Wrap text for Nama Asset (Max 2 Lines)
-    max_width = label_width - text_x - 5  
-    wrapped_lines = textwrap.wrap(nama_asset, width=20)  
-    if len(wrapped_lines) > 2:
-        wrapped_nama_asset = wrapped_lines[:2]  # Take only first 2 lines
-        wrapped_nama_asset[-1] += "..."  # Add ellipses if exceeded
-    else:
-        wrapped_nama_asset = wrapped_lines
-
-    # Draw text in order
-    draw.text((text_x, text_y), f"{nomor_asset}", font=font, fill="black")  # Nomor Asset
-    draw.text((text_x, text_y + 20), f"{kepemilikan}", font=font, fill="black")  # Kepemilikan
-    
-    # Draw wrapped Nama Asset with max 2 lines
-    for i, line in enumerate(wrapped_nama_asset):
-        draw.text((text_x, text_y + 40 + (i * 20)), f"{line}", font=font, fill="black")
-
-    # Save to memory
-    img_bytes = BytesIO()
-    label.save(img_bytes, format="PNG")
-    img_bytes.seek(0)
-
-    return img_bytes
+# Shared batching writer for the asset sheet
+writer = get_writer(TOKEN_JSON, SCOPES, SPREADSHEET_ID, SHEET_NAME)
 
 # Form for asset details
 with st.form("asset_form"):
     nomor_asset = st.text_input("📌 Nomor Asset", placeholder="Enter Asset Number", value="INV.RHF.")
     penempatan_aset = st.text_input("📍 PENEMPATAN ASET")
-    sumber = st.selectbox("🔗 Sumber", ["Invoice Fauzie", "CC Rhaya", "Invoice Futih"])
+    sumber = st.selectbox("🔗 Sumber", SUMBER_OPTIONS)
     nama_asset = st.text_input("📦 Nama Asset")
-    kelompok_aset = st.selectbox("🏷️ Kelompok Aset", ["Kelompok I", "Kelompok II"])
-    kepemilikan = st.selectbox("📝 Kepemilikan", ["RMU", "LDR", "RFI", "FUTIH"])
+    kelompok_aset = st.selectbox("🏷️ Kelompok Aset", KELOMPOK_OPTIONS)
+    kepemilikan = st.selectbox("📝 Kepemilikan", KEPEMILIKAN_OPTIONS)
     qty = st.number_input("📊 Qty", min_value=1, step=1)
     dokumentasi = st.text_input("📷 Dokumentasi URL")
     invoice = st.text_input("🧾 Invoice URL")
     harga_perolehan = st.number_input("💰 Harga Perolehan", min_value=0, step=100000)
     tahun_beli = st.number_input("📅 Tahun Beli", min_value=2000, max_value=2100, step=1, value=2025)
-    bulan_beli = st.selectbox("📆 Bulan Beli", 
-                              ["Januari", "Februari", "Maret", "April", "Mei", "Juni", 
-                               "Juli", "Agustus", "September", "Oktober", "November", "Desember"])
+    bulan_beli = st.selectbox("📆 Bulan Beli", BULAN_OPTIONS)
     umur_ekonomis = st.number_input("📈 Umur Ekonomis (years)", min_value=1, max_value=50, step=1, value=4)
-    persentase_penyusutan = st.selectbox("Persentase Penyusutan Tahunan", [25, 12.5])
-    status = st.selectbox("Status Barang", ["Available", "Missing", "Unlabeled", "Others"])
+    persentase_penyusutan = st.selectbox("Persentase Penyusutan Tahunan", PERSENTASE_PENYUSUTAN_OPTIONS)
+    status = st.selectbox("Status Barang", STATUS_OPTIONS)
     # Submit Button
     submitted = st.form_submit_button("✅ Submit")
 
@@ -103,34 +41,38 @@ with st.form("asset_form"):
 if submitted:
     if nomor_asset:
 
-        Nilai_Penyusutan_per_Bulan =(harga_perolehan * persentase_penyusutan / 100) /12
-        VALUASI_ASSET_2019 = "-"
-        VALUASI_ASSET_2020 = "-"
-        VALUASI_ASSET_2021 = "-"
-        VALUASI_ASSET_2022 = "-"
-        VALUASI_ASSET_2023 = "-"
-        VALUASI_ASSET_2024 = "-"
-        VALUASI_ASSET_2025 = "-"
-        Nilai_Buku_2024	= "-"
-        Label = True
-
-        new_row = [
-            nomor_asset, penempatan_aset, sumber, nama_asset, kelompok_aset, kepemilikan,
-            qty, dokumentasi, invoice, harga_perolehan, tahun_beli, bulan_beli, umur_ekonomis,
-            Nilai_Penyusutan_per_Bulan, VALUASI_ASSET_2019, VALUASI_ASSET_2020, VALUASI_ASSET_2021,
-            VALUASI_ASSET_2022, VALUASI_ASSET_2023, VALUASI_ASSET_2024, VALUASI_ASSET_2025,
-            Nilai_Buku_2024, status, Label
-        ]
+        new_row = new_asset_row({
+            "Nomor Asset": nomor_asset,
+            "PENEMPATAN ASET": penempatan_aset,
+            "Sumber": sumber,
+            "Nama Asset": nama_asset,
+            "Kelompok Aset": kelompok_aset,
+            "Kepemilikan": kepemilikan,
+            "Qty": qty,
+            "Dokumentasi": dokumentasi,
+            "Invoice": invoice,
+            "Harga Perolehan": harga_perolehan,
+            "Tahun Beli": tahun_beli,
+            "Bulan Beli": bulan_beli,
+            "Umur Ekonomis": umur_ekonomis,
+            "Persentase Penyusutan": persentase_penyusutan,
+            "Status": status,
+        })
         
-        # Append data to Google Sheets
-        gsheet.append_data(new_row)
+        # Stored in the local write queue right away; sent to Google Sheets in the background
+        # The audit entry is logged once the row has reached the sheet
+        writer.append(new_row, audit=(nomor_asset, None, dict(zip(COLUMNS, new_row)), "create",
+                                      st.experimental_user.get("email")))
+        writer.flush()
+        st.success("✅ Asset saved. It will appear in Google Sheets in a few seconds (see the queue in the sidebar).")
 
-        label_img = generate_label(nomor_asset, kepemilikan, nama_asset)
+        # Same label as the detail page; rendering it here also warms the label cache
+        label_img = get_label(nomor_asset, nama_asset, "PNG")
 
         st.image(label_img, caption="Generated Asset Label", use_container_width=False)
 
         # Download Button
-        st.download_button("📥 Download Label", label_img, file_name="asset_label.png", mime="image/png")
+        st.download_button("📥 Download Label", get_label(nomor_asset, nama_asset), file_name="asset_label.pdf", mime="application/pdf")
         
         st.switch_page("pages/detail_products.py")
     else:
@@ -0,0 +1,88 @@
+import streamlit as st
+import pandas as pd
+from concurrent.futures import wait
+
+from helper.asset_import import CHUNK_SIZE, read_chunks, template_csv, validate_record
+from helper.asset_index import get_asset_index
+from helper.asset_schema import COLUMNS
+from helper.sheet_writer import get_writer
+
+# Configuration
+TOKEN_JSON = dict(st.secrets["gsheet_auth"]["sheet_token_json"])
+SCOPES = st.secrets["gsheet_auth"]["SCOPES"]
+SPREADSHEET_ID = st.secrets["gsheet_auth"]["SPREADSHEET_ID"]
+SHEET_NAME = st.secrets["gsheet_auth"]["SHEET_NAME"]
+
+# Shared batching writer for the asset sheet
+writer = get_writer(TOKEN_JSON, SCOPES, SPREADSHEET_ID, SHEET_NAME)
+# Seconds to wait for a chunk before leaving the rest of it to the queue
+CHUNK_TIMEOUT = 120
+
+if st.button("⬅️ Back", help="Back to Home"):
+    st.switch_page("pages/dashboard.py")
+
+st.markdown(
+    "Upload a CSV or XLSX file with one asset per row.",
+    help="Kolom sama dengan form Add Inventory Item. Qty, Umur Ekonomis, Persentase Penyusutan dan Status boleh kosong.",
+)
+st.download_button("📄 Download Template", template_csv(), file_name="asset_import_template.csv", mime="text/csv")
+
+uploaded_file = st.file_uploader("📥 Import File", type=["csv", "xlsx"])
+
+if uploaded_file is not None and st.button("✅ Import"):
+    asset_index = get_asset_index(st.session_state["snapshot"])
+    seen = set()
+    errors = []
+    imported = 0
+    queued = 0
+    progress = st.empty()
+    progress.info("⏳ Validating rows...")
+
+    for chunk in read_chunks(uploaded_file, CHUNK_SIZE):
+        # Queue the valid rows of this chunk; the writer sends them as a few large appends
+        saved = []
+        for row_number, record in chunk:
+            row, row_errors = validate_record(record, asset_index, seen)
+            if row is None:
+                errors.append({
+                    "Row": row_number,
+                    "Nomor Asset": record.get("Nomor Asset", ""),
+                    "Error": "; ".join(row_errors),
+                })
+            else:
+                nomor_asset = record.get("Nomor Asset", "")
+                # Logged as created once the row has reached the sheet
+                audit = (nomor_asset, None, dict(zip(COLUMNS, row)), "create", st.experimental_user.get("email"))
+                saved.append((row_number, nomor_asset, writer.append(row, audit=audit)))
+        writer.flush()
+
+        # Wait for this chunk before reading the next; rows still queued after that are sent later
+        wait([future for _, _, future in saved], timeout=CHUNK_TIMEOUT)
+        for row_number, nomor_asset, future in saved:
+            if not future.done():
+                writer.forget(future)
+                queued += 1
+            elif future.exception() is not None:
+                errors.append({"Row": row_number, "Nomor Asset": nomor_asset, "Error": f"Gagal disimpan: {future.exception()}"})
+            else:
+                imported += 1
+
+        progress.info(f"⏳ {imported} imported, {len(errors)} errors so far...")
+
+    progress.empty()
+    if imported:
+        st.success(f"✅ {imported} assets imported.")
+    if queued:
+        st.warning(f"⏳ {queued} assets are queued and will be sent to Google Sheets automatically.")
+    if errors:
+        st.error(f"❌ {len(errors)} rows were not imported.")
+        report = pd.DataFrame(errors)
+        st.dataframe(report, hide_index=True)
+        st.download_button(
+            "📥 Download Error Report",
+            report.to_csv(index=False).encode(),
+            file_name="asset_import_errors.csv",
+            mime="text/csv",
+        )
+    elif not imported and not queued:
+        st.warning("⚠️ No rows found in the file.")
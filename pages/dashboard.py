@@ -8,21 +8,28 @@ from io import BytesIO
 import pathlib
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 
 import streamlit as st
 from streamlit_cookies_controller import CookieController
 
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
+from helper.drive_connection import get_drive_service
+from helper.image_cache import get_asset_image
+from helper.image_prefetch import get_prefetcher, PREFETCH_ROWS
+from helper.aggregate_cube import CubeSlice, get_aggregate_cube
+from helper.asset_schema import BULAN_OPTIONS
+from helper.filter_engine import get_filter_engine
+from helper.asset_index import get_asset_index
+from helper.depreciation import get_depreciation
+from helper.asset_search import get_asset_search
+from helper.asset_table import PAGE_SIZES, TABLE_COLUMNS, get_asset_table, page_count, positions_digest
 
 # Google Drive API Setup
 SCOPES = ["https://www.googleapis.com/auth/drive"]
 json_data = dict(st.secrets["gdrive_auth"]["token_json"])
-IMAGE_FOLDER = "downloaded_images"
 
 controller = CookieController()
 
@@ -53,71 +60,91 @@ st.markdown(
 
 data = st.session_state['data']
 
-important_columns = ["Nomor Asset", "Nama Asset", "Tahun Beli", "Bulan Beli"]
+snapshot = st.session_state['snapshot']
+asset_index = get_asset_index(snapshot)
+depreciation = get_depreciation(snapshot)
+book_values = depreciation.figure_arrays["Nilai Buku"]
 
-# Optional select filters
-penempatan_options = data["PENEMPATAN ASET"].dropna().unique()
-selected_penempatan = st.sidebar.multiselect("📍 Penempatan Aset", penempatan_options)
-
-sumber_options = data["Sumber"].dropna().unique()
-selected_sumber = st.sidebar.multiselect("📦 Sumber", sumber_options)
+# Option lists and slider bounds are precomputed once per snapshot
+filter_engine = get_filter_engine(snapshot)
+options = filter_engine.options
+bounds = filter_engine.bounds
 
-kelompok_options = data["Kelompok Aset"].dropna().unique()
-selected_kelompok = st.sidebar.multiselect("🗂️ Kelompok Aset", kelompok_options)
+# Search by name, number, placement or source; typos and partial numbers match too
+search_query = st.sidebar.text_input("🔎 Cari Aset", placeholder="macbook m1, INV.RHF.025, ...").strip()
 
-kepemilikan_options = data["Kepemilikan"].dropna().unique()
-selected_kepemilikan = st.sidebar.multiselect("👥 Kepemilikan", kepemilikan_options)
+# Optional select filters
+selected_penempatan = st.sidebar.multiselect("📍 Penempatan Aset", options["PENEMPATAN ASET"])
+selected_sumber = st.sidebar.multiselect("📦 Sumber", options["Sumber"])
+selected_kelompok = st.sidebar.multiselect("🗂️ Kelompok Aset", options["Kelompok Aset"])
+selected_kepemilikan = st.sidebar.multiselect("👥 Kepemilikan", options["Kepemilikan"])
 
 # Range Tahun Beli
-min_year = int(data["Tahun Beli"].min())
-max_year = int(data["Tahun Beli"].max())
+min_year, max_year = bounds["Tahun Beli"]
 selected_year_range = st.sidebar.slider("📅 Tahun Beli", min_year, max_year, (min_year, max_year))
-# st.write(data.sort_values("Tahun Beli"))
+
 # Bulan in ordered list
-bulan_order = [
-    "Januari", "Februari", "Maret", "April", "Mei", "Juni",
-    "Juli", "Agustus", "September", "Oktober", "November", "Desember"
-]
-bulan_options = data["Bulan Beli"].dropna().unique().tolist()
-bulan_sorted = [b for b in bulan_order if b in bulan_options]
+bulan_sorted = [b for b in BULAN_OPTIONS if b in options["Bulan Beli"]]
 selected_bulan = st.sidebar.multiselect("📆 Bulan Beli", bulan_sorted)
 
 # Range Harga Perolehan
-min_price = int(data["Harga Perolehan"].min())
-max_price = int(data["Harga Perolehan"].max())
+min_price, max_price = bounds["Harga Perolehan"]
 selected_price_range = st.sidebar.slider("💰 Harga Perolehan", min_price, max_price, (min_price, max_price))
 
-# Apply filters
-filtered_data = data.copy()
-
-if selected_penempatan:
-    filtered_data = filtered_data[filtered_data["PENEMPATAN ASET"].isin(selected_penempatan)]
-if selected_sumber:
-    filtered_data = filtered_data[filtered_data["Sumber"].isin(selected_sumber)]
-if selected_kelompok:
-    filtered_data = filtered_data[filtered_data["Kelompok Aset"].isin(selected_kelompok)]
-if selected_kepemilikan:
-    filtered_data = filtered_data[filtered_data["Kepemilikan"].isin(selected_kepemilikan)]
-
-filtered_data = filtered_data[
-    (filtered_data["Tahun Beli"] >= selected_year_range[0]) &
-    (filtered_data["Tahun Beli"] <= selected_year_range[1])
-]
-
-if selected_bulan:
-    filtered_data = filtered_data[filtered_data["Bulan Beli"].isin(selected_bulan)]
-
-filtered_data = filtered_data[
-    (filtered_data["Harga Perolehan"] >= selected_price_range[0]) &
-    (filtered_data["Harga Perolehan"] <= selected_price_range[1])
-]
-# Update this line to use filtered_data instead of full data
-data_filtered = filtered_data[important_columns]
+# Current book value from the depreciation engine (shared per snapshot)
+min_book, max_book = bounds["Nilai Buku"]
+selected_book_range = st.sidebar.slider("📉 Nilai Buku Sekarang", min_book, max_book, (min_book, max_book))
+
+# Row positions matching the filters, memoized per filter state
+positions = filter_engine.positions(
+    categories={
+        "PENEMPATAN ASET": selected_penempatan,
+        "Sumber": selected_sumber,
+        "Kelompok Aset": selected_kelompok,
+        "Kepemilikan": selected_kepemilikan,
+        "Bulan Beli": selected_bulan,
+    },
+    ranges={
+        "Tahun Beli": selected_year_range,
+        "Harga Perolehan": selected_price_range,
+        "Nilai Buku": selected_book_range,
+    },
+)
+if search_query:
+    # Search results in order of relevance, narrowed by the sidebar filters
+    search_positions = get_asset_search(snapshot).search(search_query, limit=None)
+    positions = search_positions[np.isin(search_positions, positions)]
+
+# Sorting and paging happen here; only the page on screen goes to the browser
+asset_table = get_asset_table(snapshot)
+sort_options = ["Urutan Sheet"] + TABLE_COLUMNS
+sort_state = (st.session_state.get("table_sort", sort_options[0]), st.session_state.get("table_descending", False))
+sort_column = None if sort_state[0] == sort_options[0] else sort_state[0]
+page_size = st.session_state.get("table_page_size", PAGE_SIZES[0])
+total_pages = page_count(len(positions), page_size)
+
+# Back to the first page whenever the filter or the order changes
+table_state = (positions_digest(positions), sort_state, page_size)
+if st.session_state.get("table_state") != table_state:
+    st.session_state.table_state = table_state
+    st.session_state.table_page = 1
+st.session_state.table_page = min(st.session_state.get("table_page", 1), total_pages)
+
+page_rows, page_positions = asset_table.page(
+    positions, st.session_state.table_page, page_size, sort_column, sort_state[1]
+)
+
+# Warm the image cache for what is most likely to be opened next:
+# recently scanned assets, then the top rows of the current filter
+prefetch_assets = st.session_state.get("recent_scans", []) + page_rows["Nomor Asset"].head(PREFETCH_ROWS).tolist()
+get_prefetcher(json_data, SCOPES).prefetch(
+    (asset_index.record(asset_no) or {}).get("Dokumentasi") for asset_no in prefetch_assets
+)
 
 # Display Table with Radio Button for Selection
 # Center and align buttons closely together
 # col1, col2, col3, col4, col5 = st.columns([3, 2, 0.1, 2, 3])  # Outer columns as spacers
-col1, col2, col3, col4 = st.columns([2, 0.01, 2, 6])  # Outer columns as spacers
+col1, col2, col3, col4, col5, col6 = st.columns([2, 0.01, 2, 2, 2, 2])  # Outer columns as spacers
 
 with col1:
     if st.button("📷 Scan Barcode"):
@@ -127,93 +154,120 @@ with col3:
     if st.button("➕ Add New Item"):
         st.switch_page("pages/add_items.py")
 
+with col4:
+    if st.button("📥 Bulk Import"):
+        st.switch_page("pages/bulk_import.py")
+
+with col5:
+    if st.button("🏷️ Print Labels", help="Print labels for the assets shown below"):
+        st.session_state.label_selection = data["Nomor Asset"].iloc[positions].tolist()
+        st.switch_page("pages/print_labels.py")
+
+with col6:
+    if st.button("📊 Valuation", help="Book value report for the assets shown below"):
+        st.session_state.report_selection = data["Nomor Asset"].iloc[positions].tolist()
+        st.switch_page("pages/valuation_report.py")
+
+def build_ownership_figure(cube_slice):
+    # Create Pie Chart
+    return px.pie(cube_slice.ownership,
+                  names="Kepemilikan",
+                  values="Percentage",
+                  hole=0.3)  # Creates a donut-style pie chart
+
+
+def build_timeline_figure(cube_slice):
+    acquisition_timeline = cube_slice.timeline
+
+    # Create figure with dual y-axis
+    fig1 = go.Figure()
+
+    # Bar chart: Jumlah Aset (left Y-axis)
+    fig1.add_bar(
+        x=acquisition_timeline["Tahun Beli"],
+        y=acquisition_timeline["Qty"],
+        name="Jumlah Aset",
+        yaxis="y1"
+    )
+
+    # Line chart: Harga Perolehan (right Y-axis), scaled to juta Rp
+    fig1.add_trace(go.Scatter(
+        x=acquisition_timeline["Tahun Beli"],
+        y=acquisition_timeline["Harga Perolehan"] / 1_000_000,  # in millions
+        name="Harga Perolehan (Juta Rp)",
+        yaxis="y2",
+        mode="lines+markers",
+        line=dict(color="orange", width=3),
+        marker=dict(size=6)
+    ))
+
+    # Layout with dual axes
+    fig1.update_layout(
+        title="Jumlah Aset dan Harga Perolehan per Tahun",
+        xaxis=dict(title="Tahun Beli"),
+        yaxis=dict(
+            title="Jumlah Aset",
+            showgrid=False
+        ),
+        yaxis2=dict(
+            title="Harga Perolehan (Juta Rp)",
+            overlaying="y",
+            side="right",
+            showgrid=False
+        ),
+        legend=dict(
+        orientation="h",
+        yanchor="top",
+        y=-0.3,  # Negative value moves it below the plot
+        xanchor="center",
+        x=0.5
+    ),
+        margin=dict(t=50, b=30),
+        height=400
+    )
+    return fig1
+
+
 with st.expander("See Dashboard"):
+    # Roll the pre-aggregated cube up to the current filter; price and book value
+    # ranges and search results are per asset, so then the rows are aggregated directly
+    if (not search_query
+            and tuple(selected_price_range) == bounds["Harga Perolehan"]
+            and tuple(selected_book_range) == bounds["Nilai Buku"]):
+        cube_slice = get_aggregate_cube(snapshot).rollup(
+            {
+                "PENEMPATAN ASET": selected_penempatan,
+                "Sumber": selected_sumber,
+                "Kelompok Aset": selected_kelompok,
+                "Kepemilikan": selected_kepemilikan,
+                "Bulan Beli": selected_bulan,
+            },
+            selected_year_range,
+        )
+    else:
+        cube_slice = CubeSlice.from_rows(data.iloc[positions])
+
     col1, col2 = st.columns([0.4, 0.6], border=True)
 
-    total_items = filtered_data["Qty"].sum()
+    total_items = cube_slice.qty
     col1.metric("Total Asset", f"{total_items:,.0f} Asset")
 
-    total_price = filtered_data["Harga Perolehan"].sum()
+    total_price = cube_slice.price
     col2.metric("Total Acquisition Price", f"Rp. {total_price:,.0f}")
 
+    col1, col2 = st.columns([0.4, 0.6], border=True)
+    col1.metric("Fully Depreciated", f"{(book_values[positions] <= 0).sum():,.0f} Asset")
+    col2.metric("Total Book Value", f"Rp. {book_values[positions].sum():,.0f}",
+                help="Nilai buku bulan ini untuk aset di tabel, dihitung dari harga perolehan dan penyusutan per bulan")
+
     col1, col2 = st.columns(2, border= True)
     with col1:
         st.metric("Ownership Distribution", f"")
-
-        ownership_percentage = (filtered_data["Kepemilikan"].value_counts(normalize=True) * 100).round(2)
-        # Convert ownership data into a DataFrame
-        ownership_df = pd.DataFrame({
-            "Kepemilikan": ownership_percentage.index,
-            "Percentage": ownership_percentage.values
-        })
-
-        # Create Pie Chart
-        fig = px.pie(ownership_df, 
-                    names="Kepemilikan", 
-                    values="Percentage", 
-                    hole=0.3)  # Creates a donut-style pie chart
-
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(cube_slice.figure("ownership", build_ownership_figure), use_container_width=True)
 
     with col2:
-
-        import plotly.graph_objects as go
-
-        # Aggregate data
-        acquisition_timeline = data.groupby("Tahun Beli").agg({
-            "Qty": "sum",
-            "Harga Perolehan": "sum"
-        }).reset_index()
-
-        # Create figure with dual y-axis
-        fig1 = go.Figure()
-
-        # Bar chart: Jumlah Aset (left Y-axis)
-        fig1.add_bar(
-            x=acquisition_timeline["Tahun Beli"],
-            y=acquisition_timeline["Qty"],
-            name="Jumlah Aset",
-            yaxis="y1"
-        )
-
-        # Line chart: Harga Perolehan (right Y-axis), scaled to juta Rp
-        fig1.add_trace(go.Scatter(
-            x=acquisition_timeline["Tahun Beli"],
-            y=acquisition_timeline["Harga Perolehan"] / 1_000_000,  # in millions
-            name="Harga Perolehan (Juta Rp)",
-            yaxis="y2",
-            mode="lines+markers",
-            line=dict(color="orange", width=3),
-            marker=dict(size=6)
-        ))
-
-        # Layout with dual axes
-        fig1.update_layout(
-            title="Jumlah Aset dan Harga Perolehan per Tahun",
-            xaxis=dict(title="Tahun Beli"),
-            yaxis=dict(
-                title="Jumlah Aset",
-                showgrid=False
-            ),
-            yaxis2=dict(
-                title="Harga Perolehan (Juta Rp)",
-                overlaying="y",
-                side="right",
-                showgrid=False
-            ),
-            legend=dict(
-            orientation="h",
-            yanchor="top",
-            y=-0.3,  # Negative value moves it below the plot
-            xanchor="center",
-            x=0.5
-        ),
-            margin=dict(t=50, b=30),
-            height=400
-        )
-
         # Show chart in Streamlit
-        st.plotly_chart(fig1, use_container_width=True)
+        st.plotly_chart(cube_slice.figure("timeline", build_timeline_figure), use_container_width=True)
 
 # if st.button("Scan Barcode to Search Inventory"):
 #     st.switch_page("pages/scan_barcode.py")
@@ -226,72 +280,11 @@ with st.expander("See Dashboard"):
 #     if st.button("➕ Add New Item"):
 #         st.switch_page("pages/add_items.py")
 
-def get_drive_service():
-    creds = None
-    token_path = "token.json"
-    json_path = "token.json"
-    
-    with open(json_path, "w") as json_file:
-        json.dump(json_data, json_file)
-
-    if os.path.exists(token_path):
-        creds = Credentials.from_authorized_user_file(token_path, SCOPES)
-    
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file("cred.json", SCOPES)
-            creds = flow.run_local_server(port=0)
-        with open(token_path, "w") as token:
-            token.write(creds.to_json())
-
-    return build("drive", "v3", credentials=creds)
-
-def extract_folder_id(drive_url):
-    match = re.search(r"drive\.google\.com/drive/folders/([a-zA-Z0-9_-]+)", drive_url)
-    return match.group(1) if match else None
-
-def list_images_in_folder(service, folder_id):
-    query = f"'{folder_id}' in parents and mimeType contains 'image/' and trashed=false"
-    results = service.files().list(q=query, fields="files(id, name)").execute()
-    return results.get("files", [])
-
-
-def download_image(service, image_id, image_name):
-    """Download a single image from Google Drive."""
-    image_path = os.path.join(IMAGE_FOLDER, image_name)
-    
-    if not os.path.exists(IMAGE_FOLDER):
-        os.makedirs(IMAGE_FOLDER)
-
-    request = service.files().get_media(fileId=image_id)
-    with open(image_path, "wb") as f:
-        f.write(request.execute())
-
-    return image_path
-
 def fetch_first_image():
     drive_url = st.session_state.selected_item.get("Dokumentasi", "")
-    image_path = None  # Default to no image
-    if drive_url:
-        folder_id = extract_folder_id(drive_url)
-
-        if folder_id:
-            service = get_drive_service()
-            images = list_images_in_folder(service, folder_id)
-
-            if images:
-                first_image = images[0]
-                image_path = download_image(service, first_image["id"], first_image["name"])
-
-                return image_path
-            else:
-                return None
-            
-    else: 
-        return None
-        
+    # Served from the local image cache; Drive is only asked on a miss
+    return get_asset_image(drive_url, lambda: get_drive_service(json_data, SCOPES), "display")
+
 @st.dialog("Detail Asset", width='large')
 def show_detail(asset):
     st.subheader(f"{asset['Nama Asset']}")
@@ -332,10 +325,28 @@ def show_detail(asset):
 st.markdown(' ', help="Click on left button on each row to select!")
 
 # Show filtered table
+col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
+with col1:
+    # Without a sort column the rows keep sheet order, or relevance while searching
+    st.selectbox("↕️ Urutkan", sort_options, key="table_sort",
+                 format_func=lambda option: "Relevansi" if search_query and option == sort_options[0] else option)
+with col2:
+    st.selectbox("Arah", [False, True], format_func=lambda desc: "Turun" if desc else "Naik", key="table_descending")
+with col3:
+    st.selectbox("Baris per halaman", PAGE_SIZES, key="table_page_size")
+with col4:
+    st.number_input(f"Halaman (dari {total_pages})", min_value=1, max_value=total_pages, step=1, key="table_page")
+
+first_row = (st.session_state.table_page - 1) * page_size
+st.caption(f"Menampilkan {min(first_row + 1, len(positions)):,}–{first_row + len(page_rows):,} dari {len(positions):,} aset")
+
+# Keyed by page contents, so a selection never carries over to a different page
 event = st.dataframe(
-    data_filtered,
+    page_rows,
     on_select='rerun',
-    selection_mode='single-row'
+    selection_mode='single-row',
+    column_config={"Nilai Buku": st.column_config.NumberColumn("Nilai Buku", format="Rp %d")},
+    key=f"asset_table_{positions_digest(page_positions)}",
 )
 
 if "selected_item" not in st.session_state:
@@ -345,15 +356,15 @@ if "selected_item" not in st.session_state:
 # Handle row selection
 if len(event.selection['rows']):
     selected_row = event.selection['rows'][0]
-    asset_no = data_filtered.iloc[selected_row]['Nomor Asset']
+    asset_no = page_rows['Nomor Asset'].iloc[selected_row]
 
     # If asset is different from previous one, update session and show dialog
     if asset_no != st.session_state.selected_asset_no:
         st.session_state.selected_asset_no = asset_no
         # st.session_state.selected_item = data.iloc[selected_row].to_dict()
-        st.session_state.selected_item = data[data['Nomor Asset'] == asset_no].iloc[0].to_dict()
+        st.session_state.selected_item = asset_index.record(asset_no)
 
-        controller.set('selected_item', data[data['Nomor Asset'] == asset_no].iloc[0].to_dict())
+        controller.set('selected_item', st.session_state.selected_item)
 
         # Trigger dialog
         show_detail(st.session_state.selected_item)
@@ -1,38 +1,27 @@
-import os
 import re
 import time
-import json
-import requests
-import base64
-
-from PIL import Image, ImageDraw, ImageFont
-import qrcode
-import textwrap
-from io import BytesIO
 
 import plotly.graph_objects as go
 import numpy as np
+import pandas as pd
 
 import streamlit as st
 from streamlit_cookies_controller import CookieController
 
-from datetime import datetime
-from math import floor
-from dateutil.relativedelta import relativedelta
 import calendar
 
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
+from helper.drive_connection import get_drive_service
+from helper.image_cache import load_asset_image
 
-import concurrent.futures
+from helper.labels import cached_label, get_label
+from helper.asset_index import get_asset_index
+from helper.depreciation import get_depreciation
+from helper.audit_log import get_audit_log
 
 
 # Google Drive API Setup
 SCOPES = ["https://www.googleapis.com/auth/drive"]
 json_data = dict(st.secrets["gdrive_auth"]["token_json"])
-IMAGE_FOLDER = "downloaded_images"
 
 controller = CookieController()
 cookies = controller.getAll()
@@ -56,50 +45,6 @@ else:
         time.sleep(1)
         st.switch_page("pages/dashboard.py")
 
-def get_drive_service():
-    creds = None
-    token_path = "token.json"
-    json_path = "token.json"
-    
-    with open(json_path, "w") as json_file:
-        json.dump(json_data, json_file)
-
-    if os.path.exists(token_path):
-        creds = Credentials.from_authorized_user_file(token_path, SCOPES)
-    
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file("cred.json", SCOPES)
-            creds = flow.run_local_server(port=0)
-        with open(token_path, "w") as token:
-            token.write(creds.to_json())
-
-    return build("drive", "v3", credentials=creds)
-
-def extract_folder_id(drive_url):
-    match = re.search(r"drive\.google\.com/drive/folders/([a-zA-Z0-9_-]+)", drive_url)
-    return match.group(1) if match else None
-
-def list_images_in_folder(service, folder_id):
-    query = f"'{folder_id}' in parents and mimeType contains 'image/' and trashed=false"
-    results = service.files().list(q=query, fields="files(id, name)").execute()
-    return results.get("files", [])
-
-def download_image(service, image_id, image_name):
-    """Download a single image from Google Drive."""
-    image_path = os.path.join(IMAGE_FOLDER, image_name)
-    
-    if not os.path.exists(IMAGE_FOLDER):
-        os.makedirs(IMAGE_FOLDER)
-
-    request = service.files().get_media(fileId=image_id)
-    with open(image_path, "wb") as f:
-        f.write(request.execute())
-
-    return image_path
-
 # Function to format numbers without decimals
 def format_number(value):
     try:
@@ -110,101 +55,6 @@ def format_number(value):
     except ValueError:
         return value  # Return original if not a number
 
-def generate_label(nomor_asset, nama_asset):
-    # Physical size: 60mm x 40mm → pixels at 300 DPI
-    width, height = int(60 / 25.4 * 300), int(40 / 25.4 * 300)  # 708 x 472 px
-    label = Image.new("RGB", (width, height), "white")
-    draw = ImageDraw.Draw(label)
-
-    # Split into halves
-    split_x = width // 2
-    draw.rectangle([0, 0, split_x, height], fill="black")
-
-    # Generate QR Code
-    qr = qrcode.QRCode(
-        version=None,
-        error_correction=qrcode.constants.ERROR_CORRECT_H,
-        box_size=10,
-        border=1,
-    )
-    qr.add_data(nomor_asset)
-    qr.make(fit=True)
-    qr_img = qr.make_image(fill_color="white", back_color="black").convert("RGB")
-
-    # Resize QR
-    qr_size = int(height * 0.5)
-    qr_img = qr_img.resize((qr_size, qr_size))
-
-    qr_x = (split_x - qr_size) // 2
-    qr_y = int(height * 0.1)
-    label.paste(qr_img, (qr_x, qr_y))
-
-    # Logo under QR
-    try:
-        logo = Image.open("assets/RHF LOGO WHITE.png").convert("RGBA")
-        logo_height = int(height * 0.3)
-        logo_ratio = logo.width / logo.height
-        logo = logo.resize((int(logo_ratio * logo_height), logo_height))
-        logo_x = (split_x - logo.width) // 2
-        logo_y = qr_y + qr_size + int(height * 0.04)
-        label.paste(logo, (logo_x, logo_y), logo)
-    except Exception as e:
-        print(f"⚠️ Logo not found: {e}")
-
-    # Load Soleil Bold font
-    try:
-        font = ImageFont.truetype("assets/PlusJakartaSans-ExtraBold.ttf", size=36)
-        font_no_asset = ImageFont.truetype("assets/PlusJakartaSans-Bold.ttf", size=32)
-    except:
-        font = ImageFont.load_default()
-
-    # Right half - asset name (top left)
-    text_x = split_x + int(width * 0.02)
-    text_y = int(height * 0.07)
-    wrapped = textwrap.fill(nama_asset.upper(), width=14)
-    draw.multiline_text((text_x, text_y), 
-                        wrapped,
-                        font=font,
-                        fill="black", 
-                        spacing=10, 
-                        font_size= 26)
-
-
-    # Bottom-right: nomor asset (multiline + right-aligned)
-    wrapped_nomor = textwrap.wrap(nomor_asset, width=12)
-    line_height = font_no_asset.getbbox("Ay")[3] + 6  # Height + spacing
-    total_height = len(wrapped_nomor) * line_height
-
-    # Bottom-right Y position (with padding)
-    start_y = height - int(height * 0.1) - total_height
-
-    for i, line in enumerate(wrapped_nomor):
-        line_width = draw.textlength(line, font=font_no_asset)
-        x = width - int(width * 0.04) - int(line_width)  # Right-aligned
-        y = start_y + i * line_height
-        draw.text((x, y), line, font=font_no_asset, fill="black")
-
-    # Save to memory with 300 DPI
-    output = BytesIO()
-    # label.save(output, format="PNG", dpi=(300, 300))
-    label.save(output, format="PDF", resolution=300.0)
-    output.seek(0)
-    return output
-
-# Function to generate QR code separately
-def generate_qr_code(nomor_asset):
-    qr = qrcode.QRCode(box_size=10, border=2)
-    qr.add_data(nomor_asset)
-    qr.make(fit=True)
-    qr_img = qr.make_image(fill="black", back_color="white")
-
-    # Save to memory
-    img_bytes = BytesIO()
-    qr_img.save(img_bytes, format="PNG")
-    img_bytes.seek(0)
-
-    return img_bytes
-
 col1, col2, col3, col4 = st.columns([0.2, 0.2, 0.2, 0.4])
 with col1:
     if st.button("⬅️ Back" , help= "Back to Home"):
@@ -219,33 +69,32 @@ with col3:
     nomor_asset = data_asset.get("Nomor Asset", "UNKNOWN")
     nama_asset = data_asset.get("Nama Asset", "UNKNOWN")
 
-    # Generate label and QR code
-    label_img = generate_label(nomor_asset, nama_asset)
-    qr_code_img = generate_qr_code(nomor_asset)
+    # Only render the label when asked for; earlier renders come from the cache
+    label_img = cached_label(nomor_asset, nama_asset)
+    if label_img is None and st.button("🏷️ Label", help="Generate Label"):
+        with st.spinner("🔄 Generating label..."):
+            label_img = get_label(nomor_asset, nama_asset)
 
     # st.sidebar.download_button(label="📥 Download Label", data=label_img, file_name="asset_label.png", mime="image/png")
     # st.download_button(label="📥 Download",help="Download Image", data=label_img, file_name="asset_label.png", mime="image/png")
-    st.sidebar.download_button(label="📥 Download Label", data=label_img, file_name="label.pdf", mime="application/pdf")
-    st.download_button(label="📥 Download",help="Download Image", data=label_img, file_name="label.pdf", mime="application/pdf")
+    if label_img is not None:
+        st.sidebar.download_button(label="📥 Download Label", data=label_img, file_name="label.pdf", mime="application/pdf")
+        st.download_button(label="📥 Download",help="Download Image", data=label_img, file_name="label.pdf", mime="application/pdf")
 
 # Fetch asset details
 drive_url = data_asset.get("Dokumentasi", "")
 
-image_path = None  # Default to no image
-if drive_url:
-    folder_id = extract_folder_id(drive_url)
-
-    if folder_id:
-        service = get_drive_service()
-        images = list_images_in_folder(service, folder_id)
-
-        if images:
-            first_image = images[0]
-            image_path = download_image(service, first_image["id"], first_image["name"])
+# Fetch the image in the background (from the local cache when possible) so the
+# text and financial sections render meanwhile; it is filled in at the end
+image_future = load_asset_image(drive_url, lambda: get_drive_service(json_data, SCOPES), "display")
 
 # Layout: Image on the left, key details on the right
 col1, col2 = st.columns([3, 5])
 
+with col1:
+    image_placeholder = st.empty()
+    image_placeholder.info("🔄 Loading image...")
+
 
 def is_url(value):
         return re.match(r'^https?://', value)
@@ -267,22 +116,6 @@ def render_field(label, value):
         <hr style="margin: 4px 0 10px 0; border: none; border-top: 1px solid rgba(0,0,0,0.1);" />
     """, unsafe_allow_html=True)
 
-# --- Asynchronous Image Loader ---
-def load_image(image_path):
-    try:
-        if image_path.startswith("http"):
-            response = requests.get(image_path)
-            img = Image.open(BytesIO(response.content))
-        else:
-            img = Image.open(image_path)
-        return img
-    except Exception as e:
-        return f"Failed to load image: {e}"
-
-# Trigger image loading in parallel
-with concurrent.futures.ThreadPoolExecutor() as executor:
-    image_future = executor.submit(load_image, image_path)
-
 with col2:
     st.write("### 📄 Asset Information")
     details_top = {
@@ -305,23 +138,6 @@ with col2:
         if value and value != "-":
             render_field(label, value)
 
-with col1:
-    with st.spinner("🔄 Loading image..."):
-        image_result = image_future.result()
-        if isinstance(image_result, Image.Image):
-            buffered = BytesIO()
-            image_result.save(buffered, format="PNG")
-            img_base64 = base64.b64encode(buffered.getvalue()).decode()
-            st.markdown(f"""
-                <div style="display: flex; align-items: center; justify-content: center; height: 100%; min-height: 650px;">
-                    <img src="data:image/png;base64,{img_base64}" style="max-width: 100%; height: auto;" />
-                </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.error(image_result)
-            st.image('assets/image not found placeholder.png', caption="Image Not Found")
-
-
 # Below Section - Financial Information
 st.write("---")
 st.write("### 💰 Financial & Valuation Details")
@@ -333,14 +149,6 @@ def parse_number(value):
     except:
         return 0.0
     
-def parse_month(bulan_str):
-    """Convert Indonesian month name to month number."""
-    months = {
-        "januari": 1, "februari": 2, "maret": 3, "april": 4, "mei": 5, "juni": 6,
-        "juli": 7, "agustus": 8, "september": 9, "oktober": 10, "november": 11, "desember": 12
-    }
-    return months.get(bulan_str.lower(), 1)
-
 def format_rupiah(value):
     return f"Rp {value:,.0f}".replace(",", ".")
 
@@ -353,26 +161,25 @@ tahun_beli = int(data_asset.get("Tahun Beli", 0))
 status = data_asset.get("Status", "-")
 label = data_asset.get("Label", "-")
 
-if tahun_beli > 0:
-    # --- Depreciation calculation
-    start_month = parse_month(bulan_beli)
-    start_date = datetime(int(tahun_beli), int(start_month), 1)
-    today = datetime.today()
-
-    if penyusutan_per_bulan > 0:
-        total_months = floor(harga_perolehan / penyusutan_per_bulan)
-        end_year = tahun_beli + (start_month - 1 + total_months) // 12
-        end_month = (start_month - 1 + total_months) % 12 + 1
-        end_date = datetime(int(end_year), int(end_month), 1)
-
-
-        elapsed_months = max(0, (today.year - start_date.year) * 12 + (today.month - start_date.month))
-        progress = min(1.0, elapsed_months / total_months)
-        nilai_buku = max(0, harga_perolehan - (penyusutan_per_bulan * elapsed_months))
-    else:
-        total_months = 0
-        progress = 0
-        nilai_buku = harga_perolehan
+# Depreciation figures come from the shared engine, computed for the whole snapshot
+snapshot = st.session_state["snapshot"]
+position = get_asset_index(snapshot).position(nomor_asset)
+depreciation = get_depreciation(snapshot)
+INCOMPLETE_WARNING = "Perhitungan nilai buku dan penyusutan tahunan gagal karena data tidak lengkap."
+# Whether the engine has an end date for this asset; the record shown may be newer than the snapshot row
+depreciating = False
+
+if tahun_beli > 0 and position is None:
+    st.warning(INCOMPLETE_WARNING)
+elif tahun_beli > 0:
+    figures = depreciation.figures.iloc[position]
+    total_months = int(figures["Total Bulan"])
+    progress = float(figures["Progres Penyusutan"])
+    nilai_buku = float(figures["Nilai Buku"])
+    depreciating = penyusutan_per_bulan > 0 and pd.notna(figures["Habis Nilai"])
+    if depreciating:
+        end_date = pd.Timestamp(figures["Habis Nilai"])
+        end_year, end_month = end_date.year, end_date.month
 
     # --- Summary Fields
 
@@ -388,8 +195,8 @@ if tahun_beli > 0:
         render_field(label, value)
 
     # --- Progress bar
-    if penyusutan_per_bulan > 0:
-        remaining_months = max(0, (end_date.year - today.year) * 12 + (end_date.month - today.month))
+    if depreciating:
+        remaining_months = int(figures["Sisa Bulan"])
 
         st.markdown(
             f"📉 Aset akan **habis nilai** pada **{calendar.month_name[end_month]} {end_year}** "
@@ -398,34 +205,18 @@ if tahun_beli > 0:
             unsafe_allow_html=True
         )
         st.progress(progress, text=f"{int(progress * 100)}% penyusutan")
+    elif penyusutan_per_bulan > 0:
+        st.warning(INCOMPLETE_WARNING)
     else:
         st.warning("Nilai penyusutan per bulan tidak valid atau nol.")
 
 with st.expander("Detail Penyusutan"):
-    # --- Financial calculations for yearly summary
-    def calculate_yearly_depreciation(harga_perolehan, penyusutan_per_bulan, total_months):
-        depreciation_per_year = penyusutan_per_bulan * 12
-        nilai_buku_tahunan = []
-        total_depreciation_tahunan = []
-
-        for year in range(total_months // 12 + 1):
-            depreciation_this_year = min(depreciation_per_year * (year + 1), harga_perolehan)
-            remaining_value = harga_perolehan - depreciation_this_year
-            
-            # Stop calculation if the value is less than or equal to 0
-            if remaining_value <= 0:
-                break
-            
-            nilai_buku_tahunan.append(remaining_value)
-            total_depreciation_tahunan.append(depreciation_this_year)
-
-        return nilai_buku_tahunan, total_depreciation_tahunan
-
     # Calculate yearly values
-    if tahun_beli and penyusutan_per_bulan > 0:
-        nilai_buku_tahunan, total_depreciation_tahunan = calculate_yearly_depreciation(
-            harga_perolehan, penyusutan_per_bulan, total_months
-        )
+    if depreciating:
+        # Book value after each full year, stopping once it reaches zero
+        schedule = depreciation.yearly_schedule(total_months // 12 + 1)[position]
+        nilai_buku_tahunan = schedule[schedule > 0]
+        total_depreciation_tahunan = harga_perolehan - nilai_buku_tahunan
 
         # --- Plotly chart setup
         years = np.arange(tahun_beli, tahun_beli + len(nilai_buku_tahunan))
@@ -458,10 +249,40 @@ with st.expander("Detail Penyusutan"):
         st.plotly_chart(fig)
 
     else:
-        st.warning("Perhitungan nilai buku dan penyusutan tahunan gagal karena data tidak lengkap.")
+        st.warning(INCOMPLETE_WARNING)
 
 
+with st.expander("Riwayat Perubahan"):
+    audit_log = get_audit_log()
+    history = audit_log.history(nomor_asset)
+    if history.empty:
+        st.info("Belum ada perubahan tercatat untuk aset ini.")
+    else:
+        st.dataframe(history, hide_index=True)
+
+        # Rebuilt from today's values by undoing every change made after that day
+        as_of_date = st.date_input("📅 Kondisi aset per tanggal", value=history["Waktu"].min().date())
+        as_of = pd.Timestamp(as_of_date) + pd.Timedelta(days=1)
+        state = audit_log.state_as_of(nomor_asset, as_of.to_pydatetime(), data_asset)
+        if state is None:
+            st.warning(f"Aset belum tercatat pada {as_of_date:%d-%m-%Y}.")
+        else:
+            st.dataframe(pd.DataFrame({"Kolom": list(state), "Nilai": list(state.values())}), hide_index=True)
 
 st.write("---")
 st.write("### Others Details")
-st.write("Disini akan diisikan detail kondisi barang, serial number, tipe lengkap dan lain lain")
\ No newline at end of file
+st.write("Disini akan diisikan detail kondisi barang, serial number, tipe lengkap dan lain lain")
+
+# Image last, once everything else is on screen. The downscaled file is served
+# by path, so the browser fetches it over HTTP instead of a base64 blob.
+try:
+    image_path = image_future.result()
+except Exception as e:
+    print(f"Error: {e}")
+    image_path = None
+
+with image_placeholder.container():
+    if image_path:
+        st.image(image_path, caption=data_asset.get("Nama Asset", ""), use_container_width=True)
+    else:
+        st.image('assets/image not found placeholder.png', caption="Image Not Found")
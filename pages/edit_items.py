@@ -1,8 +1,12 @@
 import streamlit as st
 import pandas as pd
+from concurrent.futures import TimeoutError as SaveTimeout
 
 # Import your helper class
-from helper.gsheet_connection import GsheetConnection
+from helper.sheet_writer import get_writer
+from helper.asset_index import get_asset_index
+from helper.asset_schema import cell_text
+from helper.row_version import RowConflict, row_hash
 
 # Configuration
 TOKEN_JSON = dict(st.secrets["gsheet_auth"]["sheet_token_json"])
@@ -10,8 +14,10 @@ SCOPES = st.secrets["gsheet_auth"]["SCOPES"]
 SPREADSHEET_ID = st.secrets["gsheet_auth"]["SPREADSHEET_ID"]
 SHEET_NAME = st.secrets["gsheet_auth"]["SHEET_NAME"]
 
-# Initialize Google Sheets connection
-gsheet = GsheetConnection(TOKEN_JSON, SCOPES, SPREADSHEET_ID, SHEET_NAME)
+# Shared batching writer for the asset sheet
+writer = get_writer(TOKEN_JSON, SCOPES, SPREADSHEET_ID, SHEET_NAME)
+# Seconds to wait for the save (and its conflict check) before leaving it to the queue
+SAVE_TIMEOUT = 15
 
 st.title("✏️ Edit Asset Details")
 
@@ -20,19 +26,44 @@ if "selected_item" not in st.session_state:
     st.error("⚠️ No asset selected. Please go back and select an asset.")
     st.stop()
 
-# Get selected asset
-asset = st.session_state.selected_item
-
-# Load all data to find row index
-df = gsheet.get_data()
-row_index = df.index[df["Nomor Asset"] == asset["Nomor Asset"]].tolist()
-
-if not row_index:
-    st.error("❌ Asset not found in the database!")
+# Find the asset through the shared index instead of reloading the sheet
+asset_index = get_asset_index(st.session_state["snapshot"])
+selected_no = st.session_state.selected_item["Nomor Asset"]
+
+# The form starts from the asset's current row, and remembers its version:
+# the save only goes through if the sheet row still has that version
+if st.session_state.get("edit_base", (None,))[0] != selected_no:
+    record = asset_index.record(selected_no)
+    if record is None:
+        st.error("❌ Asset not found in the database!")
+        st.stop()
+    st.session_state.edit_base = (selected_no, record, row_hash(record))
+    st.session_state.selected_item = dict(record)
+
+_, asset, base_hash = st.session_state.edit_base
+
+# Someone else saved this asset between loading the form and saving it
+if st.session_state.get("edit_conflict") and st.session_state.edit_conflict.asset_no != selected_no:
+    del st.session_state.edit_conflict
+if "edit_conflict" in st.session_state:
+    conflict = st.session_state.edit_conflict
+    if conflict.current is None:
+        st.error("❌ Asset ini sudah dihapus oleh pengguna lain; perubahan tidak disimpan.")
+    else:
+        st.error("⚠️ Asset ini sudah diubah oleh pengguna lain sejak form dibuka; perubahan tidak disimpan.")
+        changed = [
+            {"Kolom": column, "Saat Form Dibuka": cell_text(asset.get(column)), "Sekarang": cell_text(value)}
+            for column, value in conflict.current.items()
+            if cell_text(asset.get(column)) != cell_text(value)
+        ]
+        st.dataframe(pd.DataFrame(changed), hide_index=True)
+        if st.button("🔄 Muat Data Terbaru", help="Isi ulang form dengan data terbaru lalu ulangi perubahan"):
+            st.session_state.edit_base = (selected_no, conflict.current, row_hash(conflict.current))
+            st.session_state.selected_item = dict(conflict.current)
+            del st.session_state.edit_conflict
+            st.rerun()
     st.stop()
 
-row_index = row_index[0]  # Get the actual index
-
 # Editable form
 with st.form(key="edit_form"):
     st.subheader("📄 Asset Information")
@@ -110,17 +141,6 @@ if submitted:
     # Ensure the length matches Google Sheets columns
     update_values = update_values[:24]  # Adjust this if your sheet has more/less columns
 
-    # Dynamically determine the update range
-    columns_range = "A:X"  # Ensure this matches the actual range in Google Sheets
-    update_range = f"{SHEET_NAME}!{columns_range}{row_index+2}"
-
-    # Update the row in Google Sheets
-    gsheet.update_data(row_index, update_values, update_range)
-
-
-    st.success("✅ Asset details updated successfully!")
-
-   # Update session state
     session_keys = [
         "Nomor Asset", "PENEMPATAN ASET", "Sumber", "Nama Asset", "Kelompok Aset", "Kepemilikan", "Qty",
         "Dokumentasi", "Invoice", "Harga Perolehan", "Tahun Beli", "Bulan Beli", "Umur Ekonomis",
@@ -130,8 +150,38 @@ if submitted:
         "Nilai Buku 2024", "Status", "Label"
     ]
 
-    for key, value in zip(session_keys, update_values):
-        st.session_state.selected_item[key] = value
+    # Written to the row holding this Nomor Asset at save time, if nobody changed it meanwhile;
+    # the field-level audit entry is logged only once the write has gone through
+    audit = (asset_no, dict(asset), dict(zip(session_keys, update_values)), "update",
+             st.experimental_user.get("email"))
+    saved = writer.update_checked(asset_no, base_hash, update_values, asset_index.sheet_row(asset_no), audit=audit)
+    writer.flush()
+    written = True
+    with st.spinner("💾 Saving to Google Sheets..."):
+        try:
+            saved.result(timeout=SAVE_TIMEOUT)
+        except SaveTimeout:
+            # Kept in the durable queue; the version check runs when Google is reachable again
+            st.warning("⏳ Google Sheets is not responding; the change is queued and will be sent automatically.")
+            # Nobody waits any more: a later conflict shows up as failed in the sidebar
+            writer.forget(saved)
+            written = False
+        except RowConflict as conflict:
+            st.session_state.edit_conflict = conflict
+        except Exception as err:
+            st.error(f"❌ Failed to update asset: {err}")
+            st.stop()
+
+    if "edit_conflict" in st.session_state:
+        st.rerun()
+
+    if written:
+        st.success("✅ Asset details updated successfully!")
+        # Update session state
+        for key, value in zip(session_keys, update_values):
+            st.session_state.selected_item[key] = value
+    # The next edit starts from the row as it is in the sheet, once the snapshot has it
+    del st.session_state.edit_base
 
 # Back button
 if st.button("⬅️ Back to Asset Details"):
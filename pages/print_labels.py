@@ -0,0 +1,73 @@
+import streamlit as st
+
+from helper.asset_index import get_asset_index
+from helper.labels import FORMATS, LAYOUTS, generate_label_sheet, generate_label_zpl, page_grid
+
+if st.button("⬅️ Back", help="Back to Home"):
+    st.switch_page("pages/dashboard.py")
+
+# Pre-filled with the dashboard's current filter when coming from there
+default_numbers = "\n".join(st.session_state.get("label_selection", []))
+numbers_text = st.text_area(
+    "🏷️ Nomor Asset",
+    value=default_numbers,
+    height=250,
+    help="Satu Nomor Asset per baris",
+)
+
+output_format = st.radio(
+    "🖨️ Output",
+    ["PDF", "ZPL"],
+    horizontal=True,
+    help="ZPL dikirim langsung ke printer label thermal (300 DPI)",
+)
+
+layout = st.radio(
+    "📄 Layout",
+    list(LAYOUTS),
+    horizontal=True,
+    format_func=lambda name: f"{name} ({page_grid(name)[0] * page_grid(name)[1]} label / halaman)",
+    disabled=output_format == "ZPL",
+)
+
+if st.button("🖨️ Generate Labels"):
+    asset_index = get_asset_index(st.session_state["snapshot"])
+
+    assets = []
+    unknown = []
+    seen = set()
+    for line in numbers_text.splitlines():
+        nomor_asset = line.strip()
+        if not nomor_asset or nomor_asset in seen:
+            continue
+        seen.add(nomor_asset)
+
+        record = asset_index.record(nomor_asset)
+        if record is None:
+            unknown.append(nomor_asset)
+        else:
+            assets.append((record["Nomor Asset"], record["Nama Asset"]))
+
+    if unknown:
+        st.warning(f"⚠️ {len(unknown)} Nomor Asset not found: {', '.join(unknown)}")
+
+    if assets:
+        with st.spinner(f"🔄 Rendering {len(assets)} labels..."):
+            if output_format == "ZPL":
+                st.session_state.label_sheet = generate_label_zpl(assets)
+            else:
+                st.session_state.label_sheet = generate_label_sheet(assets, layout).getvalue()
+            st.session_state.label_sheet_count = len(assets)
+            st.session_state.label_sheet_format = output_format
+    else:
+        st.session_state.pop("label_sheet", None)
+        st.error("❌ No labels to print.")
+
+if "label_sheet" in st.session_state:
+    st.success(f"✅ {st.session_state.label_sheet_count} labels ready.")
+    st.download_button(
+        "📥 Download Labels",
+        st.session_state.label_sheet,
+        file_name=f"labels.{st.session_state.label_sheet_format.lower()}",
+        mime=FORMATS[st.session_state.label_sheet_format],
+    )
@@ -1,10 +1,115 @@
 import streamlit as st
 import time
+import pandas as pd
 from streamlit_qrcode_scanner import qrcode_scanner
 
+from helper.asset_index import get_asset_index
+from helper.filter_engine import get_filter_engine
+from helper.image_prefetch import get_prefetcher
+from helper.sheet_writer import get_writer
+from helper.stock_take import StockTake, asset_updates
+
+# Google Drive API Setup
+SCOPES = ["https://www.googleapis.com/auth/drive"]
+json_data = dict(st.secrets["gdrive_auth"]["token_json"])
+
+# Sheet the stock-take results are written to
+TOKEN_JSON = dict(st.secrets["gsheet_auth"]["sheet_token_json"])
+SHEET_SCOPES = st.secrets["gsheet_auth"]["SCOPES"]
+SPREADSHEET_ID = st.secrets["gsheet_auth"]["SPREADSHEET_ID"]
+SHEET_NAME = st.secrets["gsheet_auth"]["SHEET_NAME"]
+
+# Scanned assets remembered for image prefetching on the dashboard
+RECENT_SCANS = 10
+
 if st.button("⬅️ Back" , help= "Back to Home"):
         st.switch_page("pages/dashboard.py")
 
+mode = st.radio("Mode", ["🔍 Cari Aset", "📋 Stock Take"], horizontal=True, key="scan_mode")
+
+
+def show_stock_take():
+    snapshot = st.session_state["snapshot"]
+    asset_index = get_asset_index(snapshot)
+
+    if "stock_take" not in st.session_state:
+        st.markdown("Pilih lokasi yang akan diaudit, lalu scan semua label di lokasi tersebut.")
+        locations = get_filter_engine(snapshot).options["PENEMPATAN ASET"]
+        location = st.selectbox("📍 Penempatan Aset", locations)
+        if st.button("▶️ Mulai Stock Take"):
+            st.session_state.stock_take = StockTake(location)
+            st.rerun()
+        return
+
+    stock_take = st.session_state.stock_take
+    st.markdown(f"Stock Take **{stock_take.location}** sejak {stock_take.started_at:%H:%M}",
+                help='Scan label satu per satu; scanner tetap terbuka di halaman ini')
+
+    # Stays on this page: every decoded code is just recorded
+    qr_code = qrcode_scanner(key="stock_take_scanner")
+    if qr_code:
+        result, record = stock_take.scan(qr_code, asset_index)
+        if result == "new":
+            st.success(f"✅ {record['Nomor Asset']} — {record['Nama Asset']}")
+        elif result == "duplicate":
+            st.info(f"🔁 {record['Nomor Asset']} sudah di-scan")
+        else:
+            st.error(f"❌ {qr_code} tidak ditemukan di database")
+    else:
+        st.info("📷 Scan a product QR code...")
+
+    tally = stock_take.tally(snapshot, asset_index)
+    col1, col2, col3, col4 = st.columns(4, border=True)
+    col1.metric("Ditemukan", f"{len(tally['found']):,} / {len(tally['found']) + len(tally['missing']):,}")
+    col2.metric("Belum Ditemukan", f"{len(tally['missing']):,}")
+    col3.metric("Lokasi Lain", f"{len(tally['unexpected']):,}", help="Di-scan di sini, tapi tercatat di lokasi lain")
+    col4.metric("Tidak Dikenal", f"{len(stock_take.unknown):,}")
+
+    columns = ["Nomor Asset", "Nama Asset", "PENEMPATAN ASET", "Status"]
+    seen_times = pd.DataFrame(list(stock_take.seen.values()))
+    tab1, tab2, tab3 = st.tabs(["✅ Ditemukan", "❓ Belum Ditemukan", "⚠️ Lokasi Lain"])
+    for tab, kind in ((tab1, "found"), (tab2, "missing"), (tab3, "unexpected")):
+        rows = snapshot.data.iloc[tally[kind]][columns]
+        if kind != "missing" and len(rows):
+            rows = rows.merge(seen_times[["Nomor Asset", "Waktu"]], on="Nomor Asset", how="left")
+        tab.dataframe(rows, hide_index=True)
+
+    if st.button("📸 Upload Foto Rak", help="Baca semua label dari foto rak sekaligus"):
+        st.switch_page("pages/shelf_audit.py")
+
+    move_unexpected = st.checkbox(f"Pindahkan aset dari lokasi lain ke {stock_take.location}")
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("💾 Selesai & Simpan"):
+            changes = stock_take.changes(snapshot, asset_index, move_unexpected)
+            updates = asset_updates(changes, snapshot.data)
+            if updates:
+                # All cells go out together in one batched write, each to the row holding its
+                # Nomor Asset at that moment
+                writer = get_writer(TOKEN_JSON, SHEET_SCOPES, SPREADSHEET_ID, SHEET_NAME)
+                # Durable once queued; the sidebar shows when they have reached the sheet,
+                # and each change is logged to the audit log once it has
+                editor = st.experimental_user.get("email")
+                for asset_no, position, before, after in updates:
+                    # Not waited for; an asset deleted meanwhile shows up as failed in the sidebar
+                    writer.forget(writer.update_fields(asset_no, after, position + 2,
+                                                       audit=(asset_no, before, after, "stock_take", editor)))
+                writer.flush()
+            del st.session_state.stock_take
+            st.success(f"✅ Stock take saved ({len(changes):,} cells queued for Google Sheets)")
+    with col2:
+        if st.button("🗑️ Batalkan"):
+            del st.session_state.stock_take
+            st.rerun()
+
+
+if mode == "📋 Stock Take":
+    if "snapshot" not in st.session_state:
+        st.error("⚠️ Data not found in session state. Make sure the data is loaded first.")
+    else:
+        show_stock_take()
+    st.stop()
+
 st.markdown("Scan QR Code Label Inventaris", help= 'Pastikan QR Code Ada Pada Kotak dan Terlihat Jelas')
         
 # Open QR Scanner
@@ -22,15 +127,22 @@ if qr_code:
     time.sleep(0.3)
 
     # Get the stored dataset
-    if "data" in st.session_state:
-        data = st.session_state["data"]
+    if "snapshot" in st.session_state:
+        asset_index = get_asset_index(st.session_state["snapshot"])
 
-        # Search for the matching asset number
-        matched_row = data[data["Nomor Asset"] == qr_code]
+        # Look up the asset number in the shared index
+        matched_item = asset_index.record(qr_code)
 
-        if not matched_row.empty:
+        if matched_item is not None:
             # Store selected item in session state
-            st.session_state.selected_item = matched_row.iloc[0].to_dict()
+            st.session_state.selected_item = matched_item
+
+            # Start fetching the image while the detail page loads
+            get_prefetcher(json_data, SCOPES).prefetch([matched_item.get("Dokumentasi")])
+            recent_scans = [matched_item["Nomor Asset"]] + [
+                asset_no for asset_no in st.session_state.get("recent_scans", []) if asset_no != matched_item["Nomor Asset"]
+            ]
+            st.session_state.recent_scans = recent_scans[:RECENT_SCANS]
 
             # Redirect to product detail page
             st.switch_page("pages/detail_products.py")
@@ -0,0 +1,56 @@
+import pandas as pd
+import streamlit as st
+
+from helper.asset_index import get_asset_index
+from helper.qr_batch import decode_images, iter_images, shelf_report
+
+if st.button("⬅️ Back", help="Back to Scanner"):
+    st.switch_page("pages/scan_barcode.py")
+
+if "snapshot" not in st.session_state:
+    st.error("⚠️ Data not found in session state. Make sure the data is loaded first.")
+    st.stop()
+
+st.subheader("📸 Shelf Audit")
+st.markdown("Upload foto rak (atau satu file ZIP berisi foto); semua QR label di setiap foto dibaca sekaligus.",
+            help="Pastikan label terlihat jelas dan tidak terlalu kecil di foto")
+
+uploads = st.file_uploader(
+    "Foto Rak",
+    type=["jpg", "jpeg", "png", "bmp", "webp", "tif", "tiff", "zip"],
+    accept_multiple_files=True,
+)
+
+if uploads and st.button("🔍 Baca Label"):
+    images = list(iter_images(uploads))
+    if not images:
+        st.error("❌ No images found in the upload.")
+        st.stop()
+    with st.spinner(f"🔄 Reading labels in {len(images):,} photos..."):
+        results = decode_images(images)
+    per_image, assets = shelf_report(images, results, get_asset_index(st.session_state["snapshot"]))
+    st.session_state.shelf_audit = (per_image, assets)
+
+if "shelf_audit" in st.session_state:
+    per_image, assets = st.session_state.shelf_audit
+    per_image = pd.DataFrame(per_image)
+
+    col1, col2, col3, col4 = st.columns(4, border=True)
+    col1.metric("Aset Dikenali", f"{len(assets):,}")
+    col2.metric("Tidak Dikenal", f"{per_image['Tidak Dikenal'].sum():,}")
+    col3.metric("Duplikat", f"{per_image['Duplikat'].sum():,}", help="Label yang sudah terbaca di foto sebelumnya")
+    col4.metric("Tidak Terbaca", f"{per_image['Tidak Terbaca'].sum():,}", help="QR terdeteksi tapi gagal dibaca; coba foto lebih dekat")
+
+    st.write("### Per Foto")
+    st.dataframe(per_image, hide_index=True)
+
+    st.write("### Aset")
+    st.dataframe(pd.DataFrame(assets), hide_index=True)
+
+    # Feed the result into a running stock take as if each label had been scanned
+    if "stock_take" in st.session_state and assets:
+        stock_take = st.session_state.stock_take
+        if st.button(f"➕ Tambahkan ke Stock Take {stock_take.location}"):
+            asset_index = get_asset_index(st.session_state["snapshot"])
+            added = sum(stock_take.scan(asset["Nomor Asset"], asset_index)[0] == "new" for asset in assets)
+            st.success(f"✅ {added:,} aset baru ditambahkan ke stock take")
@@ -0,0 +1,97 @@
+from datetime import date
+
+import numpy as np
+import plotly.express as px
+import streamlit as st
+
+from helper.asset_index import get_asset_index
+from helper.asset_schema import BULAN_OPTIONS
+from helper.depreciation import get_depreciation, month_index, month_label
+from helper.valuation import (
+    EXPORT_FORMATS, GROUP_COLUMNS, asset_valuation, export_report, valuation_forecast, valuation_summary,
+)
+
+if st.button("⬅️ Back", help="Back to Home"):
+    st.switch_page("pages/dashboard.py")
+
+st.subheader("📊 Valuation Report")
+
+snapshot = st.session_state["snapshot"]
+data = snapshot.data
+engine = get_depreciation(snapshot)
+
+# Which assets: everything, or the filter the dashboard was showing
+scope_options = ["Semua Aset"]
+if st.session_state.get("report_selection"):
+    scope_options.append(f"Filter Dashboard ({len(st.session_state.report_selection):,} aset)")
+scope = st.radio("🗂️ Aset", scope_options, horizontal=True)
+
+if scope == "Semua Aset":
+    positions = np.arange(len(data))
+else:
+    asset_index = get_asset_index(snapshot)
+    positions = [asset_index.position(asset_no) for asset_no in st.session_state.report_selection]
+    positions = np.array([position for position in positions if position is not None], dtype=int)
+
+today = date.today()
+col1, col2, col3 = st.columns(3)
+with col1:
+    as_of_month = st.selectbox("📆 Per Bulan", BULAN_OPTIONS, index=today.month - 1)
+with col2:
+    as_of_year = st.number_input("📅 Per Tahun", min_value=2000, max_value=2100, value=today.year, step=1)
+with col3:
+    forecast_months = st.number_input("🔮 Forecast (bulan)", min_value=1, max_value=120, value=12, step=1)
+
+group_by = st.multiselect("📑 Group By", GROUP_COLUMNS, default=["Kepemilikan"])
+
+as_of = month_index(as_of_year, BULAN_OPTIONS.index(as_of_month) + 1)
+report = asset_valuation(data, engine, positions, as_of)
+summary = valuation_summary(report, group_by)
+
+col1, col2, col3 = st.columns(3, border=True)
+col1.metric("Total Asset", f"{len(report):,.0f} Asset")
+col2.metric("Total Acquisition Price", f"Rp. {report['Harga Perolehan'].sum():,.0f}")
+col3.metric(f"Book Value {month_label(as_of)}", f"Rp. {report['Nilai Buku'].sum():,.0f}")
+
+st.write(f"### Nilai Buku per {month_label(as_of)}")
+st.dataframe(
+    summary,
+    hide_index=True,
+    column_config={
+        column: st.column_config.NumberColumn(column, format="Rp %d")
+        for column in ("Harga Perolehan", "Akumulasi Penyusutan", "Nilai Buku")
+    },
+)
+
+# Month-by-month forecast, split by the first grouping column
+st.write("### Forecast Nilai Buku")
+forecast_group = group_by[0] if group_by else None
+forecast = valuation_forecast(data, engine, positions, as_of, int(forecast_months), forecast_group)
+fig = px.line(
+    forecast,
+    x="Bulan",
+    y=[column for column in forecast.columns if column != "Bulan"],
+    labels={"value": "Nilai Buku (Rp)", "variable": forecast_group or ""},
+    markers=True,
+)
+st.plotly_chart(fig, use_container_width=True)
+
+st.write("### Export")
+col1, col2 = st.columns([0.3, 0.7])
+with col1:
+    export_format = st.selectbox("Format", list(EXPORT_FORMATS))
+with col2:
+    st.write("")
+    if st.button("📤 Prepare Export"):
+        with st.spinner(f"🔄 Writing {len(report):,} rows..."):
+            st.session_state.valuation_export = (export_format, as_of, export_report(report, export_format))
+
+if "valuation_export" in st.session_state:
+    export_format, export_as_of, export_data = st.session_state.valuation_export
+    extension = "xlsx" if export_format == "XLSX" else export_format.lower()
+    st.download_button(
+        f"📥 Download {export_format}",
+        export_data,
+        file_name=f"valuasi_aset_{month_label(export_as_of).replace(' ', '_').lower()}.{extension}",
+        mime=EXPORT_FORMATS[export_format],
+    )